@@ -0,0 +1,310 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+from main import Board, Problem, Puzzle, SolutionCache, _solve_summary
+
+"""
+The default sweep: every A* heuristic and a range of beam widths.
+Each configuration is (algorithm, heuristic, k).
+"""
+CONFIGS: list[tuple[str, str | None, int | None]] = [
+    ("a-star", "h1", None),
+    ("a-star", "h2", None),
+    ("beam", None, 15),
+    ("beam", None, 75),
+    ("beam", None, 150),
+]
+
+def workload(depths: list[int]) -> list[str]:
+    """
+    A function to generate the deterministic benchmark states.
+
+    Parameters:
+        depths (list[int]): The numbers of random moves made from the goal.
+
+    Returns:
+        list[str]: One state per depth, as produced by randomizeState.
+    """
+
+    states: list[str] = []
+    for n in depths:
+        Puzzle.set_state("012345678")
+        Puzzle.randomize_state(n)
+        states.append(Puzzle.board.format(Puzzle.state))
+    return states
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    A function to give a percentile of a list of values (nearest rank).
+
+    Parameters:
+        values (list[float]): The values.
+
+        p (float): The percentile in [0, 100].
+
+    Returns:
+        float: The percentile of the values.
+    """
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def peak_rss() -> int:
+    """
+    A function to give the peak resident set size of this process in bytes.
+
+    The peak only ever grows, so it is the footprint of one configuration
+    only in a process that ran nothing else (see run_isolated).
+    """
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def run_config(states: list[str],
+               algorithm: str,
+               heuristic: str | None,
+               k: int | None,
+               warmup: int,
+               repeat: int,
+               options: dict = None) -> dict:
+    """
+    A function to benchmark one solver configuration over the workload.
+
+    Parameters:
+        states (list[str]): The states to solve.
+
+        algorithm (str): The search algorithm.
+
+        heuristic (str | None): The name of the heuristic (A* only).
+
+        k (int | None): The beam width (beam search only).
+
+        warmup (int): The number of untimed passes over the workload.
+
+        repeat (int): The number of timed passes over the workload.
+
+        options (dict): Other parameters of the algorithm (e.g. {"workers": 4} for HDA*).
+
+    Returns:
+        dict: The measurements of the configuration.
+    """
+
+    times: list[float] = []
+    nodes: int = 0
+    solved: int = 0
+    for rep in range(warmup + repeat):
+        for state in states:
+            problem = Problem(initial=state, goal=Board.of(state).goal)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                start_time = time.perf_counter_ns()
+                result = Puzzle.solve(problem, algorithm, heuristic or "h2", k, options)
+                seconds = (time.perf_counter_ns() - start_time) / 1e9
+            if rep < warmup:
+                continue
+            times.append(seconds)
+            status, n_count = _solve_summary(output.getvalue(), result)
+            if status == "solved":
+                solved += 1
+                nodes += n_count or 0
+
+    total = sum(times)
+    name = algorithm + (f" {heuristic}" if heuristic else "") + (f" {k}" if k else "")
+    if options and "workers" in options:
+        name += f" w{options['workers']}"
+    return {
+        "name": name,
+        "solves": len(times),
+        "solved": solved,
+        "nodes_considered": nodes // max(repeat, 1),
+        "nodes_per_second": nodes / total if total else 0.0,
+        "seconds_total": total / max(repeat, 1),
+        "seconds_p50": percentile(times, 50),
+        "seconds_p90": percentile(times, 90),
+        "seconds_p99": percentile(times, 99),
+    }
+
+def _isolated_config(results: multiprocessing.Queue, *args) -> None:
+    # Runs in a fresh process: the Puzzle class state is rebuilt as run sets it.
+    Puzzle.cache = SolutionCache(0)
+    Puzzle.set_max_nodes(math.inf)
+    result = run_config(*args)
+    result["peak_rss_bytes"] = peak_rss()
+    results.put(result)
+
+def run_isolated(*args) -> dict:
+    """
+    A function to benchmark one configuration (see run_config) in a fresh child process.
+
+    Every configuration then reports its own peak resident set size rather
+    than the largest of all configurations run before it.
+
+    Parameters:
+        args: The arguments of run_config.
+
+    Returns:
+        dict: The measurements of the configuration, with its peak_rss_bytes.
+    """
+
+    # A spawned child starts from a fresh interpreter, not a copy of this process.
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_isolated_config, args=(results, *args))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def scaling(results: list[dict]) -> None:
+    """
+    A function to add the speedup and parallel efficiency of HDA* results.
+
+    Each result is compared with the result of the same configuration on the
+    fewest workers, so efficiency is 1.0 for perfect linear scaling.
+
+    Parameters:
+        results (list[dict]): The results of one configuration, one per worker count.
+    """
+
+    base = min(results, key=lambda result: result["workers"])
+    for result in results:
+        speedup = base["seconds_total"] / result["seconds_total"] if result["seconds_total"] else 0.0
+        result["speedup"] = speedup
+        result["efficiency"] = speedup * base["workers"] / result["workers"]
+
+def run(depths: list[int], configs: list[tuple], warmup: int, repeat: int, workers: list[int] = None) -> dict:
+    """
+    A function to run the whole benchmark suite.
+
+    Parameters:
+        depths (list[int]): The randomizeState depths of the workload.
+
+        configs (list[tuple]): The (algorithm, heuristic, k) configurations to run.
+
+        warmup (int): The number of untimed passes per configuration.
+
+        repeat (int): The number of timed passes per configuration.
+
+        workers (list[int]): The worker counts to run HDA* configurations with.
+
+    Returns:
+        dict: The benchmark report.
+    """
+
+    # Results must come from searching, not from the cache.
+    Puzzle.cache = SolutionCache(0)
+    Puzzle.set_max_nodes(math.inf)
+    states = workload(depths)
+    results = []
+    for algorithm, heuristic, k in configs:
+        runs = [None]
+        if algorithm == "hda-star":
+            runs = [{"workers": n} for n in workers or [1]]
+        config_results = []
+        for options in runs:
+            result = run_isolated(states, algorithm, heuristic, k, warmup, repeat, options)
+            if options is not None:
+                result["workers"] = options["workers"]
+            print(f"{result['name']:<12} {result['nodes_considered']:>10} nodes  "
+                  f"{result['nodes_per_second']:>10.0f} nodes/s  p50 {result['seconds_p50']:.6f}s  "
+                  f"p99 {result['seconds_p99']:.6f}s", file=sys.stderr)
+            config_results.append(result)
+        if algorithm == "hda-star":
+            scaling(config_results)
+            for result in config_results:
+                print(f"{result['name']:<12} speedup {result['speedup']:.2f}  "
+                      f"efficiency {result['efficiency']:.2f}", file=sys.stderr)
+        results.extend(config_results)
+    return {
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "depths": depths,
+        "warmup": warmup,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    A function to find regressions of a benchmark report against a baseline.
+
+    A configuration regresses when its nodes considered change (the search
+    itself changed; HDA* is not deterministic and is not checked) or when
+    its median or total time grows by more than the threshold.
+
+    Parameters:
+        baseline (dict): The saved baseline report.
+
+        current (dict): The new report.
+
+        threshold (float): The allowed relative slowdown (e.g. 0.1 for 10%).
+
+    Returns:
+        list[str]: A description of every regression.
+    """
+
+    regressions: list[str] = []
+    previous = {result["name"]: result for result in baseline["results"]}
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        # The Nodes considered by HDA* depend on the timing of its workers.
+        if result["nodes_considered"] != before["nodes_considered"] and "workers" not in result:
+            regressions.append(f"{result['name']}: nodes considered {before['nodes_considered']} -> {result['nodes_considered']}")
+        for metric in ("seconds_p50", "seconds_total"):
+            if before[metric] > 0 and result[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{result['name']}: {metric} {before[metric]:.6f} -> {result[metric]:.6f} "
+                                   f"(+{100 * (result[metric] / before[metric] - 1):.1f}%)")
+    return regressions
+
+def parse_config(text: str) -> tuple[str, str | None, int | None]:
+    # "a-star:h2" or "beam:150"
+    algorithm, _, option = text.partition(":")
+    if algorithm in ("beam", "beam-batch"):
+        return algorithm, None, int(option)
+    return algorithm, option or None, None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the 8-puzzle solvers.")
+    parser.add_argument("--out", default="bench.json", help="The file to write the report to.")
+    parser.add_argument("--depths", default="1:501:10",
+                        help="The randomizeState depths, as start:stop:step or a comma-separated list.")
+    parser.add_argument("--config", action="append", type=parse_config,
+                        help="A configuration to run, e.g. a-star:h2 or beam:150 (repeatable).")
+    parser.add_argument("--workers", default="1,2,4",
+                        help="The comma-separated worker counts of HDA* configurations (e.g. hda-star:h2).")
+    parser.add_argument("--warmup", type=int, default=1, help="The number of untimed passes.")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of timed passes.")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="A saved report to check the new report against.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="The relative slowdown flagged as a regression.")
+    arguments = parser.parse_args()
+
+    if ":" in arguments.depths:
+        depths = list(range(*(int(i) for i in arguments.depths.split(":"))))
+    else:
+        depths = [int(i) for i in arguments.depths.split(",")]
+    workers = [int(i) for i in arguments.workers.split(",")]
+    report = run(depths, arguments.config or CONFIGS, arguments.warmup, arguments.repeat, workers)
+    with open(arguments.out, "w") as file:
+        json.dump(report, file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare(json.load(file), report, arguments.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        sys.exit(1 if regressions else 0)
@@ -1,3 +1,16 @@
+import argparse
+import itertools
+import math
+import random
+import sys
+
+from typing import Iterable, Iterator
+
+from main import Board, DistanceTable, run_commands
+
+"""
+The command files of the original test suite: 500 random walks per solver.
+"""
 tests: dict[str, str] = {
     "test_astar_h1": "solve a-star h1",
     "test_astar_h2": "solve a-star h2",
@@ -6,10 +19,234 @@ tests: dict[str, str] = {
     "test_beam_k150": "solve beam 150"
 }
 
-for test, command in tests.items():
-    with open(test, "w") as file:
-        file.write("time\n")
-        for i in range(1, 501):
-            file.write("setState 012345678\n")
-            file.write(f"randomizeState {i}" + "\n")
-            file.write(command + "\n")
\ No newline at end of file
+"""
+The command files exercising a command line flag of main.py, with the flags
+they are run with: each .output is the output of python main.py <flags> <file>.
+"""
+flag_tests: dict[str, str] = {
+    "test_symmetry": "--symmetry",
+    "test_compact": "--compact",
+    "test_validate": "--validate",
+    "test_checkpoint_jobs": "--jobs 2",
+    "test_jobs": "--jobs 3",
+    "test_jsonl": "--format jsonl",
+    "test_instrument": "--instrument /tmp/test_instrument.jsonl",
+    "test_cache_file": "--cache-file /tmp/test_cache_file.cache"
+}
+
+"""
+The request files of server.py, with the flags they are run with: each .output
+is the output of python server.py <flags> --requests <file>.
+"""
+server_tests: dict[str, str] = {
+    "test_server": "--workers 1"
+}
+
+def walk(seed: str = "axw582", size: int = 3) -> Iterator[str]:
+    """
+    A function to stream the states of one random walk from the goal.
+
+    The n-th state is the state randomizeState n gives (with the same seed),
+    so the states of randomizeState 1..N are generated in N moves instead of
+    replaying the walk for every instance.
+
+    Parameters:
+        seed (str): The seed of the walk.
+
+        size (int): The width of the board.
+
+    Returns:
+        Iterator[str]: The state after every move (endless).
+    """
+
+    board = Board.get(size)
+    generator = random.Random(seed)
+    state: list[int] = list(range(board.cells))
+    b_index: int = 0
+    while True:
+        _, target = generator.choice(board.moves[b_index])
+        state[b_index], state[target] = state[target], 0
+        b_index = target
+        yield board.format(state)
+
+def uniform(seed: str = "axw582", size: int = 3) -> Iterator[str]:
+    """
+    A function to stream states drawn uniformly from the solvable states.
+
+    A shuffle that is not solvable has two of its tiles swapped, which pairs
+    every unsolvable state with exactly one solvable state.
+
+    Parameters:
+        seed (str): The seed of the sampling.
+
+        size (int): The width of the board.
+
+    Returns:
+        Iterator[str]: The states (endless).
+    """
+
+    board = Board.get(size)
+    generator = random.Random(seed)
+    goal: list[int] = list(range(board.cells))
+    while True:
+        state: list[int] = goal[:]
+        generator.shuffle(state)
+        if not board.solvable(state, goal):
+            i, j = [i for i, tile in enumerate(state) if tile][:2]
+            state[i], state[j] = state[j], state[i]
+        yield board.format(state)
+
+def by_depth(depths: Iterable[int], count: int, seed: str = "axw582", distinct: bool = False) -> Iterator[str]:
+    """
+    A function to stream 8-puzzle states with an exact optimal solution depth.
+
+    States are drawn uniformly from all states at each depth, found in the
+    DistanceTable (built on first use).
+
+    Parameters:
+        depths (Iterable[int]): The optimal solution depths, in output order.
+
+        count (int): The number of states per depth.
+
+        seed (str): The seed of the sampling.
+
+        distinct (bool): Whether to draw without replacement (fewer states are
+            given for a depth with fewer than count states).
+
+    Returns:
+        Iterator[str]: The states.
+    """
+
+    depths = list(depths)
+    generator = random.Random(seed)
+    # Group the states of the wanted depths in one pass over the table.
+    indices: dict[int, list[int]] = {depth: [] for depth in depths}
+    for index, depth in enumerate(bytes(DistanceTable.load())):
+        bucket = indices.get(depth)
+        if bucket is not None:
+            bucket.append(index)
+
+    board = Board.get(3)
+    for depth in depths:
+        bucket = indices[depth]
+        if not bucket:
+            continue
+        if distinct:
+            chosen = generator.sample(bucket, min(count, len(bucket)))
+        else:
+            chosen = generator.choices(bucket, k=count)
+        for index in chosen:
+            yield board.format_key(DistanceTable.unrank(index))
+
+def unique(states: Iterable[str]) -> Iterator[str]:
+    """
+    A function to drop repeated states from a stream.
+
+    Parameters:
+        states (Iterable[str]): The states.
+
+    Returns:
+        Iterator[str]: The first occurrence of every state.
+    """
+
+    seen: set[int] = set()
+    for state in states:
+        key = Board.of(state).pack(Board.parse(state))
+        if key not in seen:
+            seen.add(key)
+            yield state
+
+def commands(states: Iterable[str], solve: str) -> Iterator[str]:
+    """
+    A function to turn a stream of states into the commands solving them.
+
+    Parameters:
+        states (Iterable[str]): The states.
+
+        solve (str): The solve command, e.g. "solve a-star h2".
+
+    Returns:
+        Iterator[str]: The command lines.
+    """
+
+    for state in states:
+        yield f"setState {state}\n"
+        yield solve + "\n"
+
+def write_suite() -> None:
+    """
+    A function to write the command files of the original test suite.
+    """
+
+    for test, command in tests.items():
+        with open(test, "w") as file:
+            file.write("time\n")
+            for i in range(1, 501):
+                file.write("setState 012345678\n")
+                file.write(f"randomizeState {i}" + "\n")
+                file.write(command + "\n")
+
+def parse_depths(text: str) -> list[int]:
+    # "20" or "10:21" or "5,10,15"
+    if ":" in text:
+        return list(range(*(int(i) for i in text.split(":"))))
+    return [int(i) for i in text.split(",")]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generates puzzle workloads (with no arguments, the command files of the test suite).")
+    parser.add_argument("--mode", choices=("walk", "uniform", "depth"),
+                        help="How to draw states: one random walk, uniformly, or by exact optimal depth.")
+    parser.add_argument("--input", metavar="FILE",
+                        help="A state file (one state per line) to read instead of drawing states.")
+    parser.add_argument("--count", type=int, default=500,
+                        help="The number of states (per depth with --mode depth).")
+    parser.add_argument("--depths", type=parse_depths, default=[20],
+                        help="The optimal depths for --mode depth, as a number, start:stop or a comma-separated list.")
+    parser.add_argument("--seed", default="axw582", help="The seed of the generator.")
+    parser.add_argument("--size", type=int, default=3, help="The width of the board (walk and uniform only).")
+    parser.add_argument("--unique", action="store_true", help="Drop repeated states.")
+    parser.add_argument("--solve", default="solve a-star h2",
+                        help="The solve command to run on every state.")
+    parser.add_argument("--format", choices=("commands", "states"), default="commands",
+                        help="Write commands for main.py, or a compact file of one state per line.")
+    parser.add_argument("--out", help="The file to write to (default: stdout).")
+    parser.add_argument("--run", action="store_true",
+                        help="Solve the states in this process instead of writing them.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="The number of processes to spread solves across (with --run).")
+    arguments = parser.parse_args()
+
+    if arguments.mode is None and arguments.input is None:
+        write_suite()
+        sys.exit(0)
+
+    if arguments.input:
+        with open(arguments.input) as file:
+            states = [line.strip() for line in file if line.strip()]
+    elif arguments.mode == "depth":
+        if arguments.size != 3:
+            parser.error("--mode depth is only available for the 8-puzzle.")
+        states = by_depth(arguments.depths, arguments.count, arguments.seed, arguments.unique)
+    else:
+        # Both streams are endless, so --unique would never end once every
+        # solvable state (half of all orderings) has been given.
+        solvable: int = math.factorial(arguments.size ** 2) // 2
+        if arguments.unique and arguments.count > solvable:
+            parser.error(f"--unique: --count is larger than the {solvable} solvable states "
+                         f"of --size {arguments.size}.")
+        source = walk if arguments.mode == "walk" else uniform
+        states = source(arguments.seed, arguments.size)
+    if arguments.unique:
+        states = unique(states)
+    if arguments.mode in ("walk", "uniform"):
+        states = itertools.islice(states, arguments.count)
+
+    if arguments.run:
+        run_commands(commands(states, arguments.solve), jobs=arguments.jobs)
+        sys.exit(0)
+    with sys.stdout if arguments.out is None else open(arguments.out, "w") as file:
+        if arguments.format == "states":
+            file.writelines(state + "\n" for state in states)
+        else:
+            file.writelines(commands(states, arguments.solve))
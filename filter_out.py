@@ -1,58 +1,194 @@
+import json
 import sys
-import re
 
-# Check for text file argument.
-if len(sys.argv) < 2:
-    print("Requires 1 valid file name.")
-else:
+from array import array
+from typing import Iterable, Iterator, TextIO
+
+class StatsAggregator:
+    """
+    A single-pass aggregator of solver results.
+
+    Counts, sums, per-depth sums and the nodes considered histogram are kept
+    incrementally. The raw (depth, nodes, time) rows are kept in compact
+    arrays, since the exact medians and the sorted listing in the .stats file
+    need every row (8 + 8 + 8 bytes per solve instead of a DataFrame).
+
+    Attributes:
+        count (int): The number of results added.
+
+        BUCKETS (tuple[int, ...]): The upper bounds of the nodes considered histogram.
+    """
+
+    BUCKETS: tuple[int, ...] = (10, 100, 1000, 10000)
+
+    def __init__(self) -> None:
+        """
+        A constructor for this StatsAggregator.
+        """
+
+        self.count: int = 0
+        self.time_sum: float = 0.0
+        self.depth_sum: int = 0
+        self.nodes_sum: int = 0
+        # Maps a depth to [number of results, sum of times].
+        self.by_depth: dict[int, list] = {}
+        # histogram[i] counts results with nodes <= BUCKETS[i] (the last entry counts the rest).
+        self.histogram: list[int] = [0] * (len(StatsAggregator.BUCKETS) + 1)
+        self.depths: array = array("q")
+        self.nodes: array = array("q")
+        self.times: array = array("d")
+
+    def add(self, nodes: int, depth: int, seconds: float) -> None:
+        """
+        A function to add the result of one solve.
+
+        Parameters:
+            nodes (int): The number of Nodes considered.
+
+            depth (int): The depth of the solution.
+
+            seconds (float): The time spent searching.
+        """
+
+        self.count += 1
+        self.time_sum += seconds
+        self.depth_sum += depth
+        self.nodes_sum += nodes
+        entry = self.by_depth.setdefault(depth, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        for i, bound in enumerate(StatsAggregator.BUCKETS):
+            if nodes <= bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+        self.depths.append(depth)
+        self.nodes.append(nodes)
+        self.times.append(seconds)
+
+    def mean(self, total: float) -> float:
+        return total / self.count if self.count else float("nan")
+
+    def median(self, values: array) -> float:
+        if not values:
+            return float("nan")
+        ordered = sorted(values)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return float(ordered[middle])
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def write(self, file: TextIO) -> None:
+        """
+        A function to write the statistics in the .stats format.
+
+        Parameters:
+            file (TextIO): The stream to write to.
+        """
+
+        file.write("Average/Median Time To Search: " + str(self.mean(self.time_sum)) + "/" + str(self.median(self.times)) + "\n")
+        file.write("Average/Median Solution Depth: " + str(self.mean(self.depth_sum)) + "/" + str(self.median(self.depths)) + "\n")
+        file.write("Average/Median Nodes Considered: " + str(self.mean(self.nodes_sum)) + "/" + str(self.median(self.nodes)) + "\n\n")
+
+        # Average time by depth.
+        file.write("Average Time by Depth\n")
+        depths = sorted(self.by_depth)
+        averages = format_floats([self.by_depth[d][1] / self.by_depth[d][0] for d in depths])
+        index = [str(d) for d in depths]
+        width = max(map(len, index), default=0)
+        value_width = max(map(len, averages), default=0)
+        file.write("\n".join(i.ljust(width) + "    " + v.rjust(value_width) for i, v in zip(index, averages)) + "\n\n")
+
+        # Number of puzzles solved under max_nodes.
+        file.write("Puzzles Solved Considering Less Than n Nodes\n")
+        below = 0
+        for bound, n in zip(StatsAggregator.BUCKETS, self.histogram):
+            below += n
+            file.write(f"Less than or equal to {bound} nodes:".ljust(35) + str(below) + "\n")
+        file.write("Greater than 10000 nodes:".ljust(35) + str(self.histogram[-1]) + "\n\n")
+
+        # Data sorted by depth (stable, so equal rows keep their input order).
+        file.write("Data Sorted by Ascending Solution Depth\n")
+        order = sorted(range(self.count), key=lambda i: (self.depths[i], self.nodes[i], self.times[i]))
+        columns = [
+            ("Depth", [str(self.depths[i]) for i in order]),
+            ("Nodes Considered", [str(self.nodes[i]) for i in order]),
+            ("Time Elapsed", format_floats([self.times[i] for i in order])),
+        ]
+        index = [str(i) for i in order]
+        width = max(map(len, index), default=0)
+        widths = [max([len(name)] + [len(v) for v in values]) for name, values in columns]
+        lines = [" " * width + "".join("  " + name.rjust(w) for (name, _), w in zip(columns, widths))]
+        for row, i in enumerate(index):
+            lines.append(i.ljust(width) + "".join("  " + values[row].rjust(w) for (_, values), w in zip(columns, widths)))
+        file.write("\n".join(lines))
+
+def format_floats(values: list[float]) -> list[str]:
+    """
+    A function to format a column of floats the way pandas prints them:
+    six decimals with trailing zeros common to the column trimmed, or
+    scientific notation when the magnitudes call for it.
+
+    Parameters:
+        values (list[float]): The column to format.
+
+    Returns:
+        list[str]: The formatted values.
+    """
+
+    nonzero = [abs(v) for v in values if v]
+    if nonzero and (min(nonzero) < 1e-6 or max(nonzero) >= 1e6):
+        return ["%.6e" % v for v in values]
+    formatted = ["%.6f" % v for v in values]
+    # Trim trailing zeros shared by every value, keeping one decimal.
+    while formatted and all(f.endswith("0") and not f.endswith(".0") for f in formatted):
+        formatted = [f[:-1] for f in formatted]
+    return formatted
+
+def parse_results(lines: Iterable[str]) -> Iterator[tuple[int, int, float]]:
+    """
+    A function to extract (nodes, depth, seconds) from main.py output in one pass.
+
+    Both the text output (timed with 'time') and the --format jsonl output are
+    accepted. Solves that failed (no 'Nodes considered'/'d:' line before their
+    timing line) are skipped instead of shifting the following results.
+
+    Parameters:
+        lines (Iterable[str]): The lines of output.
+
+    Returns:
+        Iterator[tuple[int, int, float]]: The nodes considered, depth and time of each solve.
+    """
+
+    nodes = depth = None
+    for line in lines:
+        if line.startswith("{"):
+            record = json.loads(line)
+            if record.get("command") == "solve" and record.get("status") == "solved":
+                yield record["nodes"], record["depth"], record["seconds"]
+        elif line.startswith("Nodes considered: "):
+            nodes = int(line[18:])
+        elif line.startswith("d: "):
+            depth = int(line[3:])
+        elif line.startswith("--- ") and line.rstrip().endswith(" seconds ---"):
+            if nodes is not None and depth is not None:
+                yield nodes, depth, float(line[4:].split()[0])
+            nodes = depth = None
+
+if __name__ == "__main__":
+    # Check for text file argument.
+    if len(sys.argv) < 2:
+        print("Requires 1 valid file name.")
+        sys.exit(1)
     filename = sys.argv[1]
+    # Read filename.output, or stdin with a second argument of "-".
+    source = sys.stdin if sys.argv[2:] == ["-"] else open(filename + ".output", "r")
+
+    stats = StatsAggregator()
+    with source:
+        for result in parse_results(source):
+            stats.add(*result)
 
-data = []
-
-with open(filename+".output", "r") as file:
-    for line in file:
-        matches = []
-        matches.extend(re.findall(r"Nodes considered: (\d+)", line))
-        matches.extend(re.findall(r"\bd: (\d+)", line))
-        matches.extend(re.findall(r"--- (\d+\.\d+) seconds ---", line))
-        if matches:
-            data.extend(matches)
-
-with open(filename+".csv","w") as file:
-    file.write("Nodes Considered,Depth,Time Elapsed\n")
-    for i in range(0, len(data), 3):
-        line = ",".join(data[i:i+3])
-        file.write(line+"\n")
-
-import pandas as pd
-dataframe = pd.read_csv(filename+".csv")
-# Sort by depth.
-dataframe.sort_values(["Depth", "Nodes Considered", "Time Elapsed"], inplace=True)
-with open(filename+".stats", "w") as file:
-    average_time = dataframe["Time Elapsed"].mean()
-    average_nodes = dataframe["Nodes Considered"].mean()
-    average_depth = dataframe["Depth"].mean()
-    median_time = dataframe["Time Elapsed"].median()
-    median_nodes = dataframe["Nodes Considered"].median()
-    median_depth = dataframe["Depth"].median()
-    file.write("Average/Median Time To Search: " + str(average_time) + "/" + str(median_time) + "\n")
-    file.write("Average/Median Solution Depth: " + str(average_depth) + "/" + str(median_depth) + "\n")
-    file.write("Average/Median Nodes Considered: " + str(average_nodes) + "/" + str(median_nodes) + "\n\n")
-
-    # Average time by depth.
-    file.write("Average Time by Depth\n")
-    file.write(dataframe.groupby(["Depth"])["Time Elapsed"].mean().to_string(header=False) + "\n\n")
-
-    # Number of puzzles solved under max_nodes.
-    file.write("Puzzles Solved Considering Less Than n Nodes\n")
-    file.write("Less than or equal to 10 nodes:    " + str(len(dataframe[dataframe["Nodes Considered"] <= 10])) + "\n")
-    file.write("Less than or equal to 100 nodes:   " + str(len(dataframe[dataframe["Nodes Considered"] <= 100])) + "\n")
-    file.write("Less than or equal to 1000 nodes:  " + str(len(dataframe[dataframe["Nodes Considered"] <= 1000])) + "\n")
-    file.write("Less than or equal to 10000 nodes: " + str(len(dataframe[dataframe["Nodes Considered"] <= 10000])) + "\n")
-    file.write("Greater than 10000 nodes:          " + str(len(dataframe[dataframe["Nodes Considered"] > 10000])) + "\n\n")
-
-    # Data sorted by depth.
-    file.write("Data Sorted by Ascending Solution Depth\n")
-    dataframe.sort_values(["Depth", "Nodes Considered", "Time Elapsed"], inplace=True)
-    dataframe.insert(0, "Depth", dataframe.pop("Depth"))
-    file.write(dataframe.to_string())
\ No newline at end of file
+    with open(filename + ".stats", "w") as file:
+        stats.write(file)
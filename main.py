@@ -1,22 +1,25 @@
+import contextlib
 import heapq
+import io
+import json
 import math
+import mmap
+import multiprocessing
+import os
+import queue
 import random
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
 
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
 from enum import Enum
-from pprint import pprint
-from typing import Callable
-
-"""
-Bit maps representing the direction the blank tile can move.
-For example, VALIDITY_MATRIX[2] = 0b0110 represents the top
-right corner of the 8-puzzle, where the blank tile can move
-left and down (represented by the set bits in the middle).
-"""
-VALIDITY_MATRIX = [
-    int("0b1100", 2), int("0b1110", 2), int("0b0110", 2),
-    int("0b1101", 2), int("0b1111", 2), int("0b0111", 2),
-    int("0b1001", 2), int("0b1011", 2), int("0b0011", 2)
-]
+from filter_out import StatsAggregator
+from typing import Callable, Iterable, NamedTuple
 
 class Direction(Enum):
     """
@@ -30,90 +33,490 @@ class Direction(Enum):
     DOWN = int("0b0100", 2)
     RIGHT = int("0b1000", 2)
 
+class Board:
+    """
+    A class to represent the geometry of an N×N sliding puzzle, with its
+    move and heuristic tables precomputed once per size.
+
+    States are packed as for the 8-puzzle: one fixed-width field per tile,
+    with index 0 in the most significant field. Fields are 4 bits wide up to
+    the 15-puzzle and 5 bits wide for the 24-puzzle (a 125-bit integer).
+    State strings have one base-36 digit per tile, so 3×3 states read as
+    before ("012345678") and 4×4 states as hex ("0123456789abcdef").
+
+    Attributes:
+        size (int): The number of tiles in a row.
+
+        cells (int): The number of tiles, including the blank.
+
+        bits (int): The width of a tile field in a packed state.
+
+        shifts (list[int]): The bit offset of each board index in a packed state.
+
+        offsets (dict[Direction, int]): The change of the blank index for each direction.
+
+        validity (list[int]): For each index of the blank tile, the bit map of valid directions.
+
+        moves (list[list[tuple[Direction, int]]]): For each index of the blank tile,
+            the (direction, target index) pairs available, in Direction order.
+
+        goal (str): The goal state, with the blank first.
+
+        goal_key (int): The packed goal state.
+
+        node (type[Node]): The Node class for states of this size.
+    """
+
+    DIGITS: str = "0123456789abcdefghijklmnopqrstuvwxyz"
+    SIZES: range = range(2, 7)
+
+    boards: dict[int, "Board"] = {}
+
+    def __init__(self, size: int) -> None:
+        """
+        A constructor for this Board.
+
+        Parameters:
+            size (int): The number of tiles in a row.
+        """
+
+        self.size: int = size
+        self.cells: int = size * size
+        self.bits: int = max(4, (self.cells - 1).bit_length())
+        self.mask: int = (1 << self.bits) - 1
+        self.shifts: list[int] = [self.bits * (self.cells - 1 - i) for i in range(self.cells)]
+        self.offsets: dict[Direction, int] = {Direction.UP: -size, Direction.LEFT: -1,
+                                              Direction.DOWN: size, Direction.RIGHT: 1}
+        self.validity: list[int] = []
+        for i in range(self.cells):
+            row, column = divmod(i, size)
+            self.validity.append((Direction.UP.value if row > 0 else 0) |
+                                 (Direction.LEFT.value if column > 0 else 0) |
+                                 (Direction.DOWN.value if row < size - 1 else 0) |
+                                 (Direction.RIGHT.value if column < size - 1 else 0))
+        self.moves: list[list[tuple[Direction, int]]] = [
+            [(dir, b + self.offsets[dir]) for dir in Direction if dir.value & self.validity[b]]
+            for b in range(self.cells)
+        ]
+        self.goal: str = self.format(range(self.cells))
+        self.goal_key: int = self.pack(self.goal)
+        # A packed state with a 1 in the lowest bit of every field.
+        self.lsbs: int = self.pack([1] * self.cells)
+        self.manhattan_chunks: list[tuple[int, int, list[int]]] = self.chunk_tables(self.distance)
+        self.deltas: dict[str, list] = {}
+        self.node: type[Node] = None
+
+    def get(size: int) -> "Board":
+        """
+        A function to give the Board of a given size, building its tables on first use.
+
+        Parameters:
+            size (int): The number of tiles in a row.
+
+        Returns:
+            Board: The Board.
+
+        Raises:
+            ValueError: When boards of the size are not supported.
+        """
+
+        board = Board.boards.get(size)
+        if board is None:
+            if size not in Board.SIZES:
+                raise ValueError(f"Board size ({size}) not supported.")
+            board = Board.boards[size] = Board(size)
+            # Each size has its own Node class carrying its move tables (Node itself for 3×3).
+            tables = {"BOARD": board, "ROWLEN": size, "SHIFTS": board.shifts, "MASK": board.mask,
+                      "MOVES": board.moves, "OFFSETS": board.offsets, "VALIDITY": board.validity}
+            if size == 3:
+                board.node = Node
+                for name, value in tables.items():
+                    setattr(Node, name, value)
+            else:
+                board.node = type(f"Node{size}", (Node,), {"__slots__": (), **tables})
+        return board
+
+    def of(state: str) -> "Board":
+        """
+        A function to give the Board of a state string.
+
+        Parameters:
+            state (str): The state of the puzzle.
+
+        Returns:
+            Board: The Board whose size matches the number of tiles in the state.
+
+        Raises:
+            ValueError: When the number of tiles is not the square of a supported size.
+        """
+
+        cells = len(Board.parse(state))
+        size = math.isqrt(cells)
+        if size * size != cells:
+            raise ValueError("A state with an invalid length was passed to the puzzle.")
+        return Board.get(size)
+
+    def parse(state: str) -> list[int]:
+        """
+        A function to read the tiles of a state string.
+
+        The tiles are either one base-36 digit each, optionally split into
+        groups by spaces (e.g. "012 345 678" or "0123 4567 89ab cdef"), or
+        separate decimal numbers when there are at least 9 of them
+        (e.g. "0 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15").
+
+        Parameters:
+            state (str): The state of the puzzle.
+
+        Returns:
+            list[int]: The tiles of the state in board order.
+        """
+
+        tokens = state.split()
+        if len(tokens) >= 9 and math.isqrt(len(tokens)) ** 2 == len(tokens):
+            return [int(token) for token in tokens]
+        return [int(digit, 36) for digit in "".join(tokens)]
+
+    def format(self, tiles: Iterable[int]) -> str:
+        """
+        A function to give the state string of a list of tiles.
+
+        Parameters:
+            tiles (Iterable[int]): The tiles in board order.
+
+        Returns:
+            str: One base-36 digit per tile.
+        """
+
+        return "".join(Board.DIGITS[tile] for tile in tiles)
+
+    def format_key(self, key: int) -> str:
+        """
+        A function to give the state string of a packed state.
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            str: One base-36 digit per tile.
+        """
+
+        if self.bits == 4:
+            # A 4-bit field is a hex digit.
+            return "%0*x" % (self.cells, key)
+        return self.format(self.unpack(key))
+
+    def pack(self, state: list[int] | str) -> int:
+        """
+        A function to pack a puzzle state into a single integer.
+
+        Parameters:
+            state (list[int] | str): The state of the puzzle.
+
+        Returns:
+            int: The packed state.
+        """
+
+        if isinstance(state, str):
+            state = Board.parse(state)
+        key = 0
+        for value in state:
+            key = (key << self.bits) | value
+        return key
+
+    def unpack(self, key: int) -> list[int]:
+        """
+        A function to unpack a packed state into a list of tiles.
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            list[int]: The tiles of the state in board order.
+        """
+
+        mask = self.mask
+        return [(key >> shift) & mask for shift in self.shifts]
+
+    def validate(self, tiles: list[int]) -> None:
+        """
+        A function to check that a list of tiles is a state of this Board.
+
+        Parameters:
+            tiles (list[int]): The tiles in board order.
+
+        Raises:
+            ValueError: When a tile is missing (or the number of tiles is wrong).
+        """
+
+        if len(tiles) != self.cells:
+            raise ValueError("A state with an invalid length was passed to the puzzle.")
+        present = bytearray(self.cells)
+        for tile in tiles:
+            if 0 <= tile < self.cells:
+                present[tile] = 1
+        for n in range(self.cells):
+            if not present[n]:
+                raise ValueError(f"A state is missing the number ${n} in the range [0, {self.cells - 1}].")
+
+    def solvable(self, state: list[int], goal: list[int]) -> bool:
+        """
+        A function to check in O(n) whether a state can reach a goal state.
+
+        Every move swaps the blank with a neighbouring tile, so it flips both
+        the parity of the permutation taking the goal to the state (blank
+        included) and the parity of the blank's Manhattan distance from its
+        goal index. The goal is reachable exactly when the two parities agree.
+        The permutation parity is found from its cycles rather than by counting
+        inversions.
+
+        Parameters:
+            state (list[int]): The tiles of the state in board order.
+
+            goal (list[int]): The tiles of the goal state in board order.
+
+        Returns:
+            bool: True if the goal can be reached from the state.
+        """
+
+        position = [0] * self.cells
+        for i, tile in enumerate(goal):
+            position[tile] = i
+        # A cycle of length m is m - 1 transpositions.
+        seen = bytearray(self.cells)
+        parity = 0
+        for i in range(self.cells):
+            if seen[i]:
+                continue
+            j = i
+            while not seen[j]:
+                seen[j] = 1
+                j = position[state[j]]
+                parity ^= 1
+            parity ^= 1
+        blank, goal_blank = state.index(0), goal.index(0)
+        return parity == (self.distance(blank, goal_blank) & 1)
+
+    def distance(self, i: int, value: int) -> int:
+        """
+        A function to give the Manhattan distance of a tile from its goal index.
+
+        Parameters:
+            i (int): The index of the tile.
+
+            value (int): The tile (values that are not tiles count 0).
+
+        Returns:
+            int: The Manhattan distance.
+        """
+
+        if value >= self.cells:
+            return 0
+        return abs(i % self.size - value % self.size) + abs(i // self.size - value // self.size)
+
+    def chunk_tables(self, cost: Callable[[int, int], int]) -> list[tuple[int, int, list[int]]]:
+        """
+        A function to tabulate a per-tile cost two tiles at a time.
+
+        Parameters:
+            cost (Callable[[int, int], int]): The cost of a tile value at a board index.
+
+        Returns:
+            list[tuple[int, int, list[int]]]: (shift, mask, table) triples, where
+                table[(key >> shift) & mask] is the total cost of the tiles in
+                that part of a packed state key.
+        """
+
+        bits, mask = self.bits, self.mask
+        chunks = []
+        for j in range(0, self.cells - 1, 2):
+            table = [cost(j, pair >> bits) + cost(j + 1, pair & mask) for pair in range(1 << (2 * bits))]
+            chunks.append((self.shifts[j + 1], (1 << (2 * bits)) - 1, table))
+        if self.cells % 2:
+            chunks.append((0, mask, [cost(self.cells - 1, value) for value in range(1 << bits)]))
+        return chunks
+
+    def heuristic_deltas(self, heuristic: str) -> list[list[list[int]]]:
+        """
+        A function to give the change of a heuristic for every move, built on first use.
+
+        A move of the blank from index b to index t moves one tile from t to b,
+        so only the costs of that tile and of the blank change. The costs match
+        misplaced_tiles ("h1") and manhattan_dist ("h2"), blank included.
+
+        Parameters:
+            heuristic (str): The name of the heuristic ("h1" or "h2").
+
+        Returns:
+            list[list[list[int]]]: deltas[b][t][tile], the change of the heuristic
+                when the blank moves from b to t (None for t not next to b).
+        """
+
+        deltas = self.deltas.get(heuristic)
+        if deltas is not None:
+            return deltas
+        values = range(1 << self.bits)
+        match heuristic:
+            case "h1":
+                costs = [[int(value != i) for value in values] for i in range(self.cells)]
+            case "h2":
+                costs = [[self.distance(i, value) for value in values] for i in range(self.cells)]
+            case _:
+                raise ValueError(f"Heuristic ({heuristic}) has no incremental form.")
+        deltas = [[None] * self.cells for _ in range(self.cells)]
+        for b in range(self.cells):
+            for _, t in self.moves[b]:
+                deltas[b][t] = [costs[b][tile] - costs[t][tile] + costs[t][0] - costs[b][0] for tile in values]
+        self.deltas[heuristic] = deltas
+        return deltas
+
+    def blank_costs(self, heuristic: str) -> list[int]:
+        """
+        A function to give the term of the blank tile in a heuristic, for every index of the blank.
+
+        misplaced_tiles ("h1") and manhattan_dist ("h2") count the blank tile,
+        so they can overestimate by its term. Subtracting it gives an
+        admissible heuristic, as searches proving optimality need.
+
+        Parameters:
+            heuristic (str): The name of the heuristic.
+
+        Returns:
+            list[int]: The term of the blank at each index (0 for heuristics without one).
+        """
+
+        match heuristic:
+            case "h1":
+                return [int(b != 0) for b in range(self.cells)]
+            case "h2":
+                return [self.distance(b, 0) for b in range(self.cells)]
+        return [0] * self.cells
+
+    def manhattan(self, key: int) -> int:
+        """
+        A function to calculate the Manhattan distance of a packed state (blank included).
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            int: The Manhattan distance of the tiles.
+        """
+
+        total = 0
+        for shift, mask, table in self.manhattan_chunks:
+            total += table[(key >> shift) & mask]
+        return total
+
 class Node:
     """
     A class to represent a Node in the search tree.
 
     Attributes:
-        state_str (str): A string representation of the in-order numbers in this Node.
+        key (int): The packed representation of the in-order numbers in this Node.
 
         b_index (int): An integer representing the index of the blank tile in the puzzle.
+
+        h (int | None): The heuristic value of this Node, when the search keeps it
+            up to date incrementally (see Board.heuristic_deltas).
+
+    Class Attributes:
+        BOARD (Board): The Board of the puzzle. Node itself is the 3×3 class;
+            other sizes use a subclass from Board.get with their own tables.
+            The tables (ROWLEN, SHIFTS, MASK, MOVES, OFFSETS, VALIDITY) are
+            those of the Board, set by Board.get.
     """
-    ROWLEN = 3
+    BOARD: "Board" = None
+    ROWLEN: int = None
+    SHIFTS: list[int] = None
+    MASK: int = None
+    MOVES: list[list[tuple[Direction, int]]] = None
+    OFFSETS: dict[Direction, int] = None
+    VALIDITY: list[int] = None
+
+    __slots__ = ("key", "b_index", "action", "parent", "path_cost", "h")
 
     def __init__(self,
-                 state: list[int] | str,
+                 state: list[int] | str | int,
                  parent: "Node" = None,
                  action: Direction = Direction.NONE,
-                 path_cost: int = 0) -> None:
+                 path_cost: int = 0,
+                 b_index: int = None,
+                 h: int = None) -> None:
         """
         A constructor for this Node.
 
         Parameters:
-            state (list[int] | str): The state of the puzzle.
+            state (list[int] | str | int): The state of the puzzle, either as tiles or already packed.
 
             parent (Node): The Node from which this Node was generated (if applicable).
 
             action (Direction): The action that was performed on the parent Node to generate this Node (if applicable).
 
             path_cost (int): The total cost of the path from the initial state to this Node.
+
+            b_index (int): The index of the blank tile, if already known.
+
+            h (int): The heuristic value of this Node, if kept by the search.
         """
-        
-        self.state: list[int] = [int(i) for i in state]
+
+        self.key: int = state if isinstance(state, int) else self.BOARD.pack(state)
         self.action: Direction = action
         self.parent: Node = parent
         self.path_cost: int = path_cost
-        self.state_str: str = "".join([str(n) for n in state])
-        self.b_index: int = self.state.index(0)
- 
-    def __hash__(self):
-        """# Convert the state attribute to a hashable representation
-        state_hash = tuple(self.state) if isinstance(self.state, list) else self.state
+        self.h: int = h
+        if b_index is None:
+            b_index = next(i for i, shift in enumerate(self.SHIFTS) if not (self.key >> shift) & self.MASK)
+        self.b_index: int = b_index
+
+    @property
+    def state(self) -> list[int]:
+        return self.BOARD.unpack(self.key)
 
-        # Calculate the hash based on state, action, and path_cost
-        return hash((state_hash, self.action, self.path_cost))"""
-        return hash(self.state_str)
+    @property
+    def state_str(self) -> str:
+        return self.BOARD.format_key(self.key)
+
+    def __hash__(self):
+        return hash(self.key)
 
     def __eq__(self, other):
         if isinstance(other, Node):
-            """# Compare state, action, and path_cost attributes for equality
-            return (self.state == other.state and
-                    self.action == other.action and
-                    self.path_cost == other.path_cost)"""
-            return self.state_str == other.state_str
+            return self.key == other.key
         return False
 
     def __lt__(self, other):
         if isinstance(other, Node):
-            """# Compare path_cost for less than
-            return self.path_cost < other.path_cost"""
-            return self.state_str < other.state_str
+            return self.key < other.key
         raise TypeError("Cannot compare Node with non-Node object")
 
-    def _swap(self, dir: Direction) -> str:
+    def _swap(self, dir: Direction, target: int = None, deltas: list = None) -> "Node":
         """
         A function to give the state resulting from a given action on this Node.
 
         Parameters:
             dir (Direction): The direction to move the blank tile in this puzzle.
+
+            target (int): The index the blank tile moves to, if already known.
+
+            deltas (list): Heuristic delta tables (see Board.heuristic_deltas) to give
+                the child its heuristic value from this Node's h, in O(1).
         
         Returns:
             Node: The child Node.
         """
 
-        state: list[int] = list(self.state)
-        match dir:
-            case Direction.UP:
-                state[self.b_index], state[self.b_index-3] = state[self.b_index-3], state[self.b_index]
-            case Direction.LEFT:
-                state[self.b_index], state[self.b_index-1] = state[self.b_index-1], state[self.b_index]
-            case Direction.DOWN:
-                state[self.b_index], state[self.b_index+3] = state[self.b_index+3], state[self.b_index]
-            case Direction.RIGHT:
-                state[self.b_index], state[self.b_index+1] = state[self.b_index+1], state[self.b_index]
-            case _:
+        if target is None:
+            if dir not in self.OFFSETS:
                 raise ValueError("Cannot swap in invalid direction.")
-        return Node(state, self, dir, self.path_cost + 1)
+            target = self.b_index + self.OFFSETS[dir]
+        # The blank is a zero field, so moving a tile only adds/removes its value.
+        shifts = self.SHIFTS
+        tile: int = (self.key >> shifts[target]) & self.MASK
+        key: int = self.key - (tile << shifts[target]) + (tile << shifts[self.b_index])
+        if deltas is None:
+            return self.__class__(key, self, dir, self.path_cost + 1, target)
+        return self.__class__(key, self, dir, self.path_cost + 1, target, self.h + deltas[self.b_index][target][tile])
 
     def move(self, dir: Direction) -> "Node":
         """
@@ -126,11 +529,14 @@ class Node:
             Node: A string representation of the new state.
         """
 
-        if dir.value & VALIDITY_MATRIX[self.b_index]:
+        if dir.value & self.VALIDITY[self.b_index]:
             return self._swap(dir)
         else:
             raise ValueError("Invalid move direction for blank tile.")
 
+# Node is the Node class of the 3×3 Board.
+Board.get(3)
+
 class Problem:
     def __init__(self,
                  initial: str,
@@ -142,10 +548,27 @@ class Problem:
             initial (str): The starting state of the Problem.
 
             goal (str): The desired state of the Problem.
+
+        Raises:
+            ValueError: When the states are not boards of the same size.
         """
 
         self.initial = initial
         self.goal = goal
+        self.board: Board = Board.of(goal)
+        if len(Board.parse(initial)) != self.board.cells:
+            raise ValueError("The initial and goal states of a Problem must have the same size.")
+        self.goal_key: int = self.board.pack(goal)
+
+    def is_solvable(self) -> bool:
+        """
+        A function to check whether the goal state can be reached from the initial state.
+
+        Returns:
+            bool: True if the Problem has a solution (see Board.solvable).
+        """
+
+        return self.board.solvable(Board.parse(self.initial), Board.parse(self.goal))
 
     def is_goal(self, state: Node) -> bool:
         """
@@ -158,173 +581,1530 @@ class Problem:
             bool: True if the other Node's state string is equal to this one.
         """
 
-        return state.state_str == self.goal
+        return state.key == self.goal_key
 
-    def expand(self, node: Node = None) -> list[Node]:
+    def expand(self, node: Node = None, deltas: list = None) -> list[Node]:
         """
         A function to expand the given Node given any Problem.
 
         Parameters:
             node (Node): The given Node to expand.
+
+            deltas (list): Heuristic delta tables to update the h of the children from
+                the h of the Node (see Board.heuristic_deltas).
         
         Returns:
             list[Node]: A list of Nodes representing the child states of the given Node.
         """
 
-        # An array storing valid direcions.
-        d_list: list[Node] = []
-        # The index of the blank tile.
-        for dir in Direction:
-            if VALIDITY_MATRIX[node.b_index] & dir.value:
-                d_list.append(dir)
-
-        return [node.move(dir) for dir in d_list]
+        # Valid directions are precomputed for each index of the blank tile.
+        if deltas is None:
+            return [node._swap(dir, target) for dir, target in node.MOVES[node.b_index]]
+        return [node._swap(dir, target, deltas) for dir, target in node.MOVES[node.b_index]]
 
-class Puzzle:
+class Symmetry:
     """
-    A struct for holding the puzzle state.
+    The reflection of an N×N board across its main diagonal, with tile relabelling.
+
+    Reflecting a state moves the tile at (row, column) to (column, row) and
+    relabels it with the tile whose goal position is reflected the same way.
+    The goal (blank at index 0) is its own mirror, so a state and its mirror
+    are the same distance from the goal, and the moves solving one solve the
+    other once up and left (and down and right) are swapped. Each pair of
+    mirrored states is represented by the smaller packed state.
+
+    Attributes:
+        board (Board): The Board reflected.
+
+        transpose (list[int]): The index each board index is reflected to
+            (also the label each tile is relabelled with).
+
+        chunks (list[tuple[int, int, list[int]]]): Tables giving the mirrored
+            packed state two tiles at a time (see Board.chunk_tables).
 
     Class Attributes:
-        state (list[int]):
-            A list representing the current state of the 8-puzzle.
+        DIRECTIONS (dict[Direction, Direction]): The mirror of every move of the blank.
 
-        is_valid (bool):
-            A bool representing the 
+        NAMES (dict[str, str]): The mirror of every printed move.
 
-        max_nodes (int | float):
-            An integer representing the maximium number of Nodes
-            to be searched in A* or beam search. Default is math.inf.
+        symmetries (dict[int, Symmetry]): The Symmetry of each board size, built on first use.
     """
 
-    state: list[int] = []
-    is_valid: bool = False
-    max_nodes: int | float = math.inf
+    DIRECTIONS: dict[Direction, Direction] = {
+        Direction.NONE: Direction.NONE,
+        Direction.UP: Direction.LEFT, Direction.LEFT: Direction.UP,
+        Direction.DOWN: Direction.RIGHT, Direction.RIGHT: Direction.DOWN,
+    }
+    NAMES: dict[str, str] = {"up": "left", "left": "up", "down": "right", "right": "down"}
 
-    def action(cmd: str) -> None:
+    symmetries: dict[int, "Symmetry"] = {}
+
+    def __init__(self, board: Board) -> None:
         """
-        A function to map a command string to a corresponding puzzle function.
-        
+        A constructor for this Symmetry.
+
         Parameters:
-            command (str):
-                A string representing a command to execute on this puzzle.
+            board (Board): The Board to reflect.
         """
 
-        # Remove whitespace and standardize command string.
-        args: list[str] = cmd.lower().strip().split()
-
-        if "setstate" in args[0]:
-            # args = ["setstate", "xxx", "xxx", "xxx"]
-            # Get the puzzle sequence from the command.
-            Puzzle.set_state("".join(args[1:]))
-        elif "printstate" in args[0]:
-            # Print the current state of the puzzle.
-            Puzzle.print_state()
-        elif "move" in args[0]:
-            # Move the blank tile in the specified direction.
-            Puzzle.move(Direction[args[1].upper()])
-        elif "randomizestate" in args[0]:
-            # Shuffle the puzzle with n moves.
-            Puzzle.randomize_state(int(args[1]))
-        elif "solve" in args[0] and "a-star" in args[1]:
-            problem = Problem(initial="".join(str(i) for i in Puzzle.state), goal="012345678")
-            match args[2]:
-                case "h1":
-                    heuristic = Puzzle.misplaced_tiles
-                case "h2":
-                    heuristic = Puzzle.manhattan_dist
-                case _:
-                    print(f"Heuristic (f{args[2]}) not recognized/implemented.")
-            Puzzle.solve_astar(problem, heuristic)
-        elif "solve" in args[0] and "beam" in args[1]:
-            problem = Problem(initial="".join(str(i) for i in Puzzle.state), goal="012345678")
-            heuristic = Puzzle.manhattan_dist
-            k = int(args[2])
-            Puzzle.solve_beam(problem, heuristic, k)
-        elif "maxnodes" in args[0]:
-            n = int(args[1])
-            Puzzle.set_max_nodes(n)
-        else:
-            print(f"Action (f{args[0]}) not recognized/implemented.")
+        size = board.size
+        self.board: Board = board
+        self.transpose: list[int] = [(i % size) * size + i // size for i in range(board.cells)]
+        transpose, shifts = self.transpose, board.shifts
+        self.chunks: list[tuple[int, int, list[int]]] = board.chunk_tables(
+            lambda i, value: transpose[value] << shifts[transpose[i]] if value < board.cells else 0)
 
-    def set_state(state: str) -> None:
+    def get(board: Board) -> "Symmetry":
         """
-        A function to set and validate the state of the puzzle with a new state.
+        A function to give the Symmetry of a Board, building it on first use.
 
-        Parameters: 
-            state (str):
-                A string representing a state in the form "xxx xxx xxx" where each
-                value x is a number from [0, 9).
+        Parameters:
+            board (Board): The Board.
 
-        Raises:
-            ValueError:
-                When the given input state does not meet the requirements specified
-                in the parameter description.
+        Returns:
+            Symmetry: The Symmetry of the Board.
         """
 
-        # Trim all spaces from the input.
-        state: list[int] = [int(number) for number in state.replace(" ", "")]
+        symmetry = Symmetry.symmetries.get(board.size)
+        if symmetry is None:
+            symmetry = Symmetry.symmetries[board.size] = Symmetry(board)
+        return symmetry
 
-        # Validate the values of the proposed input state.
-        if len(state) != 9:
-            Puzzle.is_valid = False
-            raise ValueError("A state with an invalid length was passed to the puzzle.")
-        for n in range(9):
-            if n not in state:
-                Puzzle.is_valid = False
-                raise ValueError(f"A state is missing the number ${n} in the range [0, 8].")
-        
-        # Update the puzzle state.
-        Puzzle.state = state
-        Puzzle.is_valid = True
+    def mirror(self, key: int) -> int:
+        """
+        A function to reflect a packed state.
 
-    def print_state() -> None:
-        if Puzzle.is_valid:
-            pprint(" ".join([str(i) for i in Puzzle.state]), width=Node.ROWLEN**2)
+        Parameters:
+            key (int): The packed state.
 
-    def move(direction: Direction) -> None:
+        Returns:
+            int: The packed mirror of the state.
         """
-        A function to move the blank tile in the puzzle.
+
+        mirrored = 0
+        for shift, mask, table in self.chunks:
+            mirrored |= table[(key >> shift) & mask]
+        return mirrored
+
+    def canonical(self, key: int) -> tuple[int, bool]:
+        """
+        A function to give the representative of a packed state and its mirror.
 
         Parameters:
-            move (Direction):
-                An integer representing the desired direction of movement for the
-                blank tile.
+            key (int): The packed state.
 
-        Raises:
-            RuntimeError:
-                When the direction of movement is not possible for the blank tile.
-            
-            ValueError:
-                When the given move direction does not exist (i.e. not Direction.UP,
-                Direction.DOWN, Direction.LEFT, or Direction.RIGHT).
+        Returns:
+            tuple[int, bool]: The representative, and whether it is the mirror of the state.
         """
 
-        # Validate input.
-        if (type(direction) is not Direction or
-            direction is Direction.NONE):
-            raise ValueError("Invalid input argument.")
+        mirrored = self.mirror(key)
+        return (mirrored, True) if mirrored < key else (key, False)
 
-        # Check is the puzzle state is set.
-        if Puzzle.is_valid:
-            # Get the index of the blank tile.
-            b_index: int = Puzzle.state.index(0)
-            if direction.value & VALIDITY_MATRIX[b_index]:
-                # Swap blank tile in a given direction.
-                Puzzle.__swap(b_index, direction)
-            else: 
+    def mirror_state(self, state: str) -> str:
+        """
+        A function to reflect a state string.
+
+        Parameters:
+            state (str): The state.
+
+        Returns:
+            str: The mirror of the state, formatted like a packed state.
+        """
+
+        return self.board.format_key(self.mirror(self.board.pack(Board.parse(state))))
+
+    def mirror_solution(self, result, output: str) -> tuple:
+        """
+        A function to turn the result and output of a solve into those of the mirrored solve.
+
+        Parameters:
+            result: The value returned by the solver.
+
+            output (str): Everything the solver printed.
+
+        Returns:
+            tuple: The mirrored result and output (the printed moves are mirrored;
+                counts and other lines are kept as they are).
+        """
+
+        if isinstance(result, tuple):
+            result = (result[0], [(self.mirror_state(state), Symmetry.NAMES.get(move, move)) for state, move in result[1]])
+        lines = output.split("\n")
+        return result, "\n".join(Symmetry.NAMES.get(line, line) for line in lines)
+
+    def max_lookup(self, lookup: Callable[[int], int]) -> Callable[[int], int]:
+        """
+        A function to strengthen a heuristic lookup with the lookup of the mirrored state.
+
+        Both values are admissible estimates of the same distance, so their
+        maximum is too.
+
+        Parameters:
+            lookup (Callable[[int], int]): A heuristic on packed states (towards the standard goal).
+
+        Returns:
+            Callable[[int], int]: The larger of the heuristic of a state and of its mirror.
+        """
+
+        mirror = self.mirror
+        return lambda key: max(lookup(key), lookup(mirror(key)))
+
+class VisitedSet:
+    """
+    A set of reached states stored as a bitmap over their permutation ranks.
+
+    Each state takes one bit (plus two bits for the move that reached it),
+    indexed by DistanceTable.rank, so the whole set is 9!/2 * 3 bits (about
+    68 KB) however many states are added. Ranks are unique among the states
+    reachable from any single initial state, solvable or not. The moves let
+    the path to any added state be rebuilt without keeping parent Nodes alive.
+    """
+
+    CODES: dict[Direction, int] = {Direction.UP: 0, Direction.LEFT: 1, Direction.DOWN: 2, Direction.RIGHT: 3}
+    DIRECTIONS: list[Direction] = [Direction.UP, Direction.LEFT, Direction.DOWN, Direction.RIGHT]
+
+    def __init__(self) -> None:
+        """
+        A constructor for this VisitedSet.
+        """
+
+        size = math.factorial(9) // 2
+        self.bits: bytearray = bytearray((size + 7) // 8)
+        self.moves: bytearray = bytearray((size + 3) // 4)
+        self.count: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: int) -> bool:
+        index = DistanceTable.rank(key)[0]
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def add(self, key: int, action: Direction = Direction.NONE) -> None:
+        """
+        A function to add a state and the move that reached it.
+
+        Parameters:
+            key (int): The packed state.
+
+            action (Direction): The move of the blank tile that reached the state.
+        """
+
+        index = DistanceTable.rank(key)[0]
+        mask = 1 << (index & 7)
+        if self.bits[index >> 3] & mask:
+            return
+        self.bits[index >> 3] |= mask
+        self.count += 1
+        shift = (index & 3) * 2
+        code = VisitedSet.CODES.get(action, 0)
+        self.moves[index >> 2] = (self.moves[index >> 2] & ~(3 << shift)) | (code << shift)
+
+    def move(self, key: int) -> Direction:
+        """
+        A function to give the move that reached an added state.
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            Direction: The move of the blank tile that reached the state.
+        """
+
+        index = DistanceTable.rank(key)[0]
+        return VisitedSet.DIRECTIONS[(self.moves[index >> 2] >> ((index & 3) * 2)) & 3]
+
+    def path(self, initial: int, key: int) -> Node:
+        """
+        A function to rebuild the Nodes from the initial state to an added state.
+
+        Parameters:
+            initial (int): The packed initial state.
+
+            key (int): The packed state the path ends at (every state on the path must be added).
+
+        Returns:
+            Node: The Node for the state, with parents back to the initial state.
+        """
+
+        opposite = {Direction.UP: Direction.DOWN, Direction.DOWN: Direction.UP,
+                    Direction.LEFT: Direction.RIGHT, Direction.RIGHT: Direction.LEFT}
+        moves: list[Direction] = []
+        node = Node(key)
+        while node.key != initial:
+            dir = self.move(node.key)
+            moves.append(dir)
+            # Undo the move to get the parent state.
+            node = node._swap(opposite[dir])
+
+        node = Node(initial)
+        for dir in reversed(moves):
+            node = node._swap(dir)
+        return node
+
+class CostTable:
+    """
+    A map from states to path costs stored as one byte per permutation rank.
+
+    It has the dict methods solve_astar uses for g(n), in a fixed 9!/2 bytes.
+    """
+
+    UNSET: int = 0xFF
+
+    def __init__(self, costs: dict[int, int] = None) -> None:
+        """
+        A constructor for this CostTable.
+
+        Parameters:
+            costs (dict[int, int]): Initial costs by packed state.
+        """
+
+        self.costs: bytearray = bytearray([CostTable.UNSET]) * (math.factorial(9) // 2)
+        for key, cost in (costs or {}).items():
+            self[key] = cost
+
+    def __setitem__(self, key: int, cost: int) -> None:
+        self.costs[DistanceTable.rank(key)[0]] = min(cost, CostTable.UNSET - 1)
+
+    def get(self, key: int, default: int | float = None) -> int | float:
+        cost = self.costs[DistanceTable.rank(key)[0]]
+        return default if cost == CostTable.UNSET else cost
+
+class OpenList:
+    """
+    A priority queue of Nodes for A* search keyed by f(n) = g(n) + h(n).
+
+    Each state is queued at most once: pushing a state that is already queued
+    with a better path replaces the old entry (decrease-key by lazy deletion),
+    and membership is an O(1) lookup on the index of queued states.
+
+    Ties on f(n) are broken deterministically by the tie_break policy:
+        "state": by packed state (the original ordering of the solver).
+        "h": prefer the lower h(n), i.e. the deeper Node, then by packed state.
+        "fifo": prefer the Node that was queued first.
+    """
+
+    TIE_BREAKS = ("state", "h", "fifo")
+
+    def __init__(self, tie_break: str = "state") -> None:
+        """
+        A constructor for this OpenList.
+
+        Parameters:
+            tie_break (str): The tie-breaking policy for equal f(n).
+        """
+
+        if tie_break not in OpenList.TIE_BREAKS:
+            raise ValueError(f"Tie-breaking policy ({tie_break}) not recognized/implemented.")
+        self.tie_break: str = tie_break
+        self.heap: list[tuple] = []
+        # Maps a queued state to its live Node.
+        self.index: dict[int, Node] = {}
+        self.counter: int = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, node: Node) -> bool:
+        return node.key in self.index
+
+    def push(self, node: Node, h: int) -> None:
+        """
+        A function to queue a Node, replacing any queued Node with the same state.
+
+        Parameters:
+            node (Node): The Node to queue.
+
+            h (int): The heuristic value of the Node.
+        """
+
+        f: int = node.path_cost + h
+        match self.tie_break:
+            case "state":
+                entry = (f, node.key, node)
+            case "h":
+                entry = (f, h, node.key, node)
+            case "fifo":
+                self.counter += 1
+                entry = (f, self.counter, node)
+        self.index[node.key] = node
+        heapq.heappush(self.heap, entry)
+
+    def pop(self) -> Node:
+        """
+        A function to remove and return the queued Node with the lowest priority.
+
+        Returns:
+            Node: The Node with the lowest priority.
+
+        Raises:
+            IndexError: When the queue is empty.
+        """
+
+        index = self.index
+        while True:
+            node: Node = heapq.heappop(self.heap)[-1]
+            # Skip entries that were replaced by a better path.
+            if index.get(node.key) is node:
+                del index[node.key]
+                return node
+
+    def peek(self) -> int:
+        """
+        A function to give the lowest f(n) in the queue without removing its Node.
+
+        Returns:
+            int: The lowest f(n) of a queued Node (math.inf if the queue is empty).
+        """
+
+        heap, index = self.heap, self.index
+        # Drop entries that were replaced by a better path.
+        while heap and index.get(heap[0][-1].key) is not heap[0][-1]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else math.inf
+
+class BeamLayer:
+    """
+    The k best successors of a beam search layer.
+
+    With the "fifo" tie_break or the "drop" duplicates policy, the layer is
+    selected as the successors are generated and only the k best Nodes are
+    ever held: a bounded max-heap keeps the worst selected Node on top, and a
+    new Node either replaces it or is dropped.
+
+    Ties on h(n) are broken deterministically by the tie_break policy:
+        "state": by packed state (the original ordering of the solver).
+        "fifo": prefer the Node that was generated first.
+
+    The default policies ("state" and "keep", i.e. plain "solve beam k") are
+    unchanged from the original solver and are not bounded: every successor is
+    pushed on a heap and the layer is taken with heapq.nsmallest, whose order
+    among repeats of a state (equal h(n) and state, but different paths)
+    depends on their heap positions. A bounded heap cannot reproduce that
+    order, and the solutions of the test suites depend on it.
+
+    Repeated states are handled by the duplicates policy:
+        "keep": every successor competes for the layer, even closed states and
+            repeats of a selected state (the original behaviour of the solver).
+        "drop": closed states and states already in the layer are filtered
+            when they are generated, so the layer holds k distinct open states.
+    """
+
+    TIE_BREAKS = ("state", "fifo")
+    DUPLICATES = ("keep", "drop")
+
+    def __init__(self,
+                 k: int,
+                 closed_set: set[int] | VisitedSet,
+                 tie_break: str = "state",
+                 duplicates: str = "keep") -> None:
+        """
+        A constructor for this BeamLayer.
+
+        Parameters:
+            k (int): The beam width.
+
+            closed_set (set[int] | VisitedSet): The closed states of the search.
+
+            tie_break (str): The tie-breaking policy for equal h(n).
+
+            duplicates (str): The policy for closed and repeated states.
+        """
+
+        if tie_break not in BeamLayer.TIE_BREAKS:
+            raise ValueError(f"Tie-breaking policy ({tie_break}) not recognized/implemented.")
+        if duplicates not in BeamLayer.DUPLICATES:
+            raise ValueError(f"Duplicate policy ({duplicates}) not recognized/implemented.")
+        self.k: int = k
+        self.closed_set: set[int] | VisitedSet = closed_set
+        self.tie_break: str = tie_break
+        self.drop: bool = duplicates == "drop"
+        # Whether successors are kept unbounded and selected as the original solver did.
+        self.unbounded: bool = tie_break == "state" and not self.drop
+        # Entries are negated, so the worst selected Node is on top of the heap
+        # (unless unbounded, where entries are (h, Node) as in the original solver).
+        self.heap: list[tuple] = []
+        # Maps a selected state to its entry (only when dropping duplicates).
+        self.index: dict[int, tuple] = {}
+        self.counter: int = 0
+        # The number of successors filtered as closed or as repeats.
+        self.closed_hits: int = 0
+        self.duplicates: int = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, node: Node, h: int) -> None:
+        """
+        A function to offer a successor to the layer.
+
+        Parameters:
+            node (Node): The successor.
+
+            h (int): The heuristic value of the successor.
+        """
+
+        if self.unbounded:
+            self.counter += 1
+            heapq.heappush(self.heap, (h, node))
+            return
+        if self.drop:
+            if node.key in self.closed_set:
+                self.closed_hits += 1
+                return
+            if node.key in self.index:
+                # Nodes of a layer share g(n), so the first path is as good as any.
+                self.duplicates += 1
+                return
+        self.counter += 1
+        if self.tie_break == "state":
+            # Equal states keep the order they were generated in.
+            entry = (-h, -node.key, -self.counter, node)
+        else:
+            entry = (-h, -self.counter, node)
+        heap = self.heap
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            evicted = heapq.heapreplace(heap, entry)
+            if self.drop:
+                del self.index[evicted[-1].key]
+        else:
+            return
+        if self.drop:
+            self.index[node.key] = entry
+
+    def nodes(self) -> list[Node]:
+        """
+        A function to give the selected Nodes, best first.
+
+        Returns:
+            list[Node]: The Nodes of the layer.
+        """
+
+        if self.unbounded:
+            return [entry[1] for entry in heapq.nsmallest(self.k, self.heap)]
+        return [entry[-1] for entry in sorted(self.heap, reverse=True)]
+
+def map_table(path: str, size: int, build: Callable[[], bytes]) -> mmap.mmap:
+    """
+    A function to memory-map a precomputed table, building and saving it first if needed.
+
+    Parameters:
+        path (str): The file storing the table.
+
+        size (int): The expected size of the table in bytes.
+
+        build (Callable[[], bytes]): A function building the contents of the table.
+
+    Returns:
+        mmap.mmap: The read-only memory-mapped table.
+    """
+
+    if not os.path.exists(path) or os.path.getsize(path) != size:
+        data = build()
+        # Write to a temporary file first so a partial file is never mapped.
+        with open(path + ".tmp", "wb") as file:
+            file.write(data)
+        os.replace(path + ".tmp", path)
+
+    with open(path, "rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class PatternDatabase:
+    """
+    A disjoint (additive) pattern database for the 8-puzzle and the 15-puzzle.
+
+    The tiles are split into disjoint patterns. For each pattern, a table
+    stores the fewest moves of that pattern's tiles needed to bring them home,
+    found by a backward BFS from the goal in which a pattern tile may move to
+    any neighbouring cell not holding another pattern tile (the blank and the
+    other tiles are left out). A move of the puzzle moves one tile of one
+    pattern by one cell, so it changes the sum of the tables by at most one:
+    the heuristic is admissible and consistent.
+
+    A table is indexed by the positions (p_1, ..., p_k) of its pattern's tiles
+    as the base-N² number p_1 ... p_k, one byte per entry. The tables of a
+    board are written to PATH once and memory-mapped on first use.
+
+    Class Attributes:
+        PATTERNS (dict[int, tuple[tuple[int, ...], ...]]): The disjoint tile patterns of each board size.
+
+        databases (dict[int, PatternDatabase]): The database of each board size, once used.
+
+    Attributes:
+        board (Board): The Board of the puzzle.
+
+        path (str): The file storing the tables.
+
+        tables (mmap.mmap): The loaded tables (None until first use).
+
+        offsets (list[int]): The offset of each pattern's table in the tables.
+
+        index_chunks (list[tuple[int, int, list[int]]]): Chunk tables (see
+            Board.chunk_tables) giving the partial table indexes contributed by
+            two packed tiles, for all patterns at once: the index into the table
+            of pattern p is stored in the bits [p * width, (p + 1) * width).
+    """
+
+    PATTERNS: dict[int, tuple[tuple[int, ...], ...]] = {
+        3: ((1, 2, 3, 4), (5, 6, 7, 8)),
+        4: ((1, 2, 3), (4, 5, 8, 9), (6, 7, 10, 11), (12, 13, 14, 15)),
+    }
+
+    databases: dict[int, "PatternDatabase"] = {}
+
+    def __init__(self, board: Board) -> None:
+        """
+        A constructor for this PatternDatabase.
+
+        Parameters:
+            board (Board): The Board of the puzzle.
+        """
+
+        self.board: Board = board
+        self.patterns: tuple[tuple[int, ...], ...] = PatternDatabase.PATTERNS[board.size]
+        self.path: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{board.cells - 1}puzzle.apdb")
+        self.sizes: list[int] = [board.cells ** len(pattern) for pattern in self.patterns]
+        self.offsets: list[int] = [sum(self.sizes[:p]) for p in range(len(self.patterns))]
+        self.width: int = max(self.sizes).bit_length()
+        self.tables: mmap.mmap = None
+        self.index_chunks: list[tuple[int, int, list[int]]] = None
+
+    def get(board: Board) -> "PatternDatabase":
+        """
+        A function to give the pattern database of a Board.
+
+        Parameters:
+            board (Board): The Board of the puzzle.
+
+        Returns:
+            PatternDatabase: The pattern database (not loaded until its first lookup).
+
+        Raises:
+            ValueError: When there are no patterns for boards of this size.
+        """
+
+        database = PatternDatabase.databases.get(board.size)
+        if database is None:
+            if board.size not in PatternDatabase.PATTERNS:
+                raise ValueError(f"No pattern database for {board.size}×{board.size} boards.")
+            database = PatternDatabase.databases[board.size] = PatternDatabase(board)
+        return database
+
+    def build(self, pattern: tuple[int, ...]) -> bytearray:
+        """
+        A function to build the table for a single pattern.
+
+        Parameters:
+            pattern (tuple[int, ...]): The tiles in the pattern, in goal order.
+
+        Returns:
+            bytearray: The table of move counts for the pattern.
+        """
+
+        cells = self.board.cells
+        moves = self.board.moves
+        weights = [cells ** (len(pattern) - 1 - rank) for rank in range(len(pattern))]
+        unseen = 0xFF
+        # Indexes of overlapping positions are never reached and stay unseen.
+        table = bytearray([unseen]) * (cells ** len(pattern))
+        start = sum(tile * weight for tile, weight in zip(pattern, weights))
+        table[start] = 0
+        layer: list[int] = [start]
+        depth = 0
+        while layer:
+            next_layer: list[int] = []
+            for index in layer:
+                tiles = [(index // weight) % cells for weight in weights]
+                for tile, weight in zip(tiles, weights):
+                    # Board.moves lists the neighbours of every cell.
+                    for _, target in moves[tile]:
+                        if target in tiles:
+                            continue
+                        child = index + (target - tile) * weight
+                        if table[child] == unseen:
+                            table[child] = depth + 1
+                            next_layer.append(child)
+            layer = next_layer
+            depth += 1
+
+        return table
+
+    def load(self) -> mmap.mmap:
+        """
+        A function to load the tables, building and saving them first if needed.
+
+        Returns:
+            mmap.mmap: The memory-mapped tables.
+        """
+
+        if self.tables is not None:
+            return self.tables
+
+        self.tables = map_table(
+            self.path, sum(self.sizes),
+            lambda: b"".join(self.build(pattern) for pattern in self.patterns))
+
+        # A table index is a sum of terms position * N²^(rank of the tile in its
+        # pattern), so every tile adds its term to the field of its pattern.
+        weight = [0] * (1 << self.board.bits)
+        for p, pattern in enumerate(self.patterns):
+            for rank, tile in enumerate(pattern):
+                weight[tile] = self.board.cells ** (len(pattern) - 1 - rank) << (p * self.width)
+        self.index_chunks = self.board.chunk_tables(lambda i, value: i * weight[value])
+        return self.tables
+
+    def lookup(self, key: int) -> int:
+        """
+        A function to give the pattern database estimate of a packed state.
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            int: The sum of the pattern table entries for the state.
+        """
+
+        tables = self.tables
+        if tables is None:
+            tables = self.load()
+        index = 0
+        for shift, mask, table in self.index_chunks:
+            index += table[(key >> shift) & mask]
+        total = 0
+        field = (1 << self.width) - 1
+        for offset in self.offsets:
+            total += tables[offset + (index & field)]
+            index >>= self.width
+        return total
+
+class DistanceTable:
+    """
+    A table of the exact distance to the goal 012345678 of every solvable state.
+
+    Every solvable state has a perfect hash in [0, 9!/2): the index of the
+    blank tile times 8!/2, plus half the Lehmer rank of the other tiles in
+    board order. Halving is exact because swapping the last two tiles changes
+    only the lowest Lehmer digit and always changes solvability. The table
+    (one byte per state) is built once by BFS from the goal, written to PATH,
+    and memory-mapped on first use.
+
+    Class Attributes:
+        PATH (str): The file storing the table.
+
+        table (mmap.mmap): The loaded table (None until first use).
+    """
+
+    PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "8puzzle.dist")
+    SIZE: int = math.factorial(9) // 2
+    FACTORIALS: list[int] = [math.factorial(7 - i) for i in range(8)]
+
+    table: mmap.mmap = None
+
+    def rank(key: int) -> tuple[int, bool]:
+        """
+        A function to give the perfect hash of a packed state.
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            tuple[int, bool]: The index of the state in the table and whether the state is solvable.
+        """
+
+        unused = 0x1FE
+        lehmer = 0
+        parity = 0
+        i = 0
+        b_index = 0
+        for position, shift in enumerate(Node.SHIFTS):
+            tile = (key >> shift) & 0xF
+            if tile == 0:
+                b_index = position
+                continue
+            # The Lehmer digit is the number of smaller tiles still unused.
+            digit = (unused & ((1 << tile) - 1)).bit_count()
+            unused ^= 1 << tile
+            lehmer += digit * DistanceTable.FACTORIALS[i]
+            parity ^= digit & 1
+            i += 1
+        return b_index * (DistanceTable.SIZE // 9) + (lehmer >> 1), parity == 0
+
+    def unrank(index: int) -> int:
+        """
+        A function to give the solvable state with a given perfect hash (the inverse of rank).
+
+        Parameters:
+            index (int): The index of the state in the table.
+
+        Returns:
+            int: The packed state.
+        """
+
+        b_index, half = divmod(index, DistanceTable.SIZE // 9)
+        lehmer = half << 1
+        digits: list[int] = [(lehmer // factorial) % (8 - i) for i, factorial in enumerate(DistanceTable.FACTORIALS)]
+        # Halving dropped the second-to-last digit (0 or 1; the last is always 0).
+        # It is whichever makes the permutation even.
+        digits[6] = sum(digits) & 1
+        unused: list[int] = list(range(1, 9))
+        tiles: list[int] = [unused.pop(digit) for digit in digits]
+        tiles.insert(b_index, 0)
+        return Node.BOARD.pack(tiles)
+
+    def build() -> bytearray:
+        """
+        A function to build the table by BFS from the goal state.
+
+        A state and its mirror (see Symmetry) are the same distance from the
+        goal, so both are labelled when either is reached and only the one
+        reached is expanded, which halves the states the BFS expands.
+
+        Returns:
+            bytearray: The distance of every solvable state.
+        """
+
+        board = Node.BOARD
+        mirror = Symmetry.get(board).mirror
+        shifts = board.shifts
+        table = bytearray([0xFF]) * DistanceTable.SIZE
+        table[DistanceTable.rank(board.goal_key)[0]] = 0
+        layer: list[tuple[int, int]] = [(board.goal_key, 0)]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer: list[tuple[int, int]] = []
+            for key, b_index in layer:
+                for _, target in board.moves[b_index]:
+                    tile = (key >> shifts[target]) & 0xF
+                    child = key - (tile << shifts[target]) + (tile << shifts[b_index])
+                    index = DistanceTable.rank(child)[0]
+                    if table[index] == 0xFF:
+                        table[index] = depth
+                        table[DistanceTable.rank(mirror(child))[0]] = depth
+                        next_layer.append((child, target))
+            layer = next_layer
+
+        return table
+
+    def load() -> mmap.mmap:
+        """
+        A function to load the table, building and saving it first if needed.
+
+        Returns:
+            mmap.mmap: The memory-mapped table.
+        """
+
+        if DistanceTable.table is None:
+            DistanceTable.table = map_table(DistanceTable.PATH, DistanceTable.SIZE, DistanceTable.build)
+        return DistanceTable.table
+
+    def distance(key: int) -> int | None:
+        """
+        A function to give the exact distance of a packed state to the goal.
+
+        Parameters:
+            key (int): The packed state.
+
+        Returns:
+            int | None: The number of moves to the goal, or None if the state is not solvable.
+        """
+
+        table = DistanceTable.table
+        if table is None:
+            table = DistanceTable.load()
+        index, solvable = DistanceTable.rank(key)
+        return table[index] if solvable else None
+
+    def benchmark(queries: int = 100000) -> dict[str, float]:
+        """
+        A function to measure the build time, file size and query latency of the table.
+
+        Parameters:
+            queries (int): The number of random states to look up.
+
+        Returns:
+            dict[str, float]: The build time (s), file size (bytes) and mean query latency (ns).
+        """
+
+        start_time = time.perf_counter()
+        table = DistanceTable.build()
+        build_time = time.perf_counter() - start_time
+        DistanceTable.load()
+
+        generator = random.Random("axw582")
+        keys: list[int] = []
+        for _ in range(queries):
+            state = list(range(9))
+            generator.shuffle(state)
+            keys.append(Node.BOARD.pack(state))
+        start_time = time.perf_counter_ns()
+        for key in keys:
+            DistanceTable.distance(key)
+        latency = (time.perf_counter_ns() - start_time) / queries
+
+        return {"build_seconds": build_time, "file_bytes": len(table), "query_ns": latency}
+
+class SolutionCache:
+    """
+    A bounded cache of solver results with least-recently-used eviction.
+
+    Entries are keyed by (initial, goal, algorithm, heuristic, k, options, max_nodes)
+    and store both the value returned by the solver and everything it printed,
+    so a hit replays exactly the output of the original solve.
+
+    Attributes:
+        capacity (int): The maximum number of entries kept (0 disables the cache).
+
+        hits (int): The number of lookups answered from the cache.
+
+        misses (int): The number of lookups that had to be solved.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        A constructor for this SolutionCache.
+
+        Parameters:
+            capacity (int): The maximum number of entries kept (0 disables the cache).
+        """
+
+        self.capacity: int = capacity
+        self.entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> tuple | None:
+        """
+        A function to look up a cached result, marking it as recently used.
+
+        Parameters:
+            key (tuple): The cache key of the solve.
+
+        Returns:
+            tuple | None: The cached (result, output), or None on a miss.
+        """
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, result, output: str) -> None:
+        """
+        A function to cache a result, evicting the least recently used entries if full.
+
+        Parameters:
+            key (tuple): The cache key of the solve.
+
+            result: The value returned by the solver.
+
+            output (str): Everything the solver printed.
+        """
+
+        if self.capacity <= 0:
+            return
+        self.entries[key] = (result, output)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """
+        A function to give the hit/miss counters of this cache.
+
+        Returns:
+            dict[str, int]: The hits, misses and current size of the cache.
+        """
+
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+    def save(self, path: str) -> None:
+        """
+        A function to save the cached entries to a file (one JSON object per line).
+
+        Parameters:
+            path (str): The file to write.
+        """
+
+        with open(path + ".tmp", "w") as file:
+            for key, (result, output) in self.entries.items():
+                file.write(json.dumps({"key": key, "result": result, "output": output}) + "\n")
+        os.replace(path + ".tmp", path)
+
+    def load(self, path: str) -> None:
+        """
+        A function to load entries saved by save(), if the file exists.
+
+        Parameters:
+            path (str): The file to read.
+        """
+
+        if not os.path.exists(path):
+            return
+        with open(path) as file:
+            for line in file:
+                entry = json.loads(line)
+                result = entry["result"]
+                if isinstance(result, list):
+                    # backtrace results are (depth, [(state_str, move), ...]).
+                    result = (result[0], [tuple(item) for item in result[1]])
+                self.put(tuple(entry["key"]), result, entry["output"])
+
+class SearchCheckpoint:
+    """
+    A snapshot of an A* search that can be saved to disk and resumed.
+
+    The snapshot holds the open list, the closed set with its g-values, and
+    the search tree above the open Nodes. Every Node that is an ancestor of
+    an open Node is kept (with its parent, the move that reached it and its
+    g-value), so a resumed search gives the same solution paths. The file is
+    one JSON header line followed by the zlib-compressed tables: packed
+    states as fixed-width bytes, and other columns as arrays.
+
+    Attributes:
+        header (dict): The problem, heuristic, tie-breaking policy and number of Nodes considered.
+
+        keys (list[int]): The packed states of the Nodes of the tree.
+
+        parents (array): The index of the parent of each Node (-1 for the root).
+
+        actions (array): The Direction value of the move that reached each Node.
+
+        costs (array): The g-value of each Node.
+
+        open (array): The indices of the open Nodes, in priority order.
+
+        closed (list[int]): The closed states.
+
+        closed_costs (array): The g-value of each closed state.
+    """
+
+    VERSION: int = 1
+
+    def __init__(self, header: dict) -> None:
+        """
+        A constructor for this SearchCheckpoint.
+
+        Parameters:
+            header (dict): The problem, heuristic, tie-breaking policy and number of Nodes considered.
+        """
+
+        self.header: dict = header
+        self.keys: list[int] = []
+        self.parents: array = array("q")
+        self.actions: array = array("B")
+        self.costs: array = array("I")
+        self.open: array = array("q")
+        self.closed: list[int] = []
+        self.closed_costs: array = array("I")
+
+    def capture(problem: Problem,
+                heuristic: str,
+                frontier: OpenList,
+                g_score: dict[int, int],
+                closed_set: set[int],
+                n_count: int) -> "SearchCheckpoint":
+        """
+        A function to take a snapshot of a running A* search.
+
+        Parameters:
+            problem (Problem): The Problem being solved.
+
+            heuristic (str): The name of the heuristic function.
+
+            frontier (OpenList): The open list.
+
+            g_score (dict[int, int]): The cheapest known cost of every reached state.
+
+            closed_set (set[int]): The closed states.
+
+            n_count (int): The number of Nodes considered so far.
+
+        Returns:
+            SearchCheckpoint: The snapshot.
+        """
+
+        snapshot = SearchCheckpoint({
+            "version": SearchCheckpoint.VERSION,
+            "size": problem.board.size,
+            "initial": problem.board.format_key(problem.board.node(problem.initial).key),
+            "goal": problem.board.format_key(problem.goal_key),
+            "heuristic": heuristic,
+            "tie_break": frontier.tie_break,
+            "n_count": n_count,
+        })
+        # Number the Nodes of the tree by identity: after a reopening, two
+        # Nodes of the same state can both have open descendants.
+        numbers: dict[int, int] = {}
+
+        def number(start: Node) -> int:
+            chain: list[Node] = []
+            node = start
+            while node is not None and id(node) not in numbers:
+                chain.append(node)
+                node = node.parent
+            for node in reversed(chain):
+                numbers[id(node)] = len(snapshot.keys)
+                snapshot.parents.append(numbers[id(node.parent)] if node.parent is not None else -1)
+                snapshot.keys.append(node.key)
+                snapshot.actions.append(node.action.value)
+                snapshot.costs.append(node.path_cost)
+            return numbers[id(start)]
+
+        # Live entries in heap order, so a "fifo" open list keeps its order.
+        live = [entry for entry in frontier.heap if frontier.index.get(entry[-1].key) is entry[-1]]
+        for entry in sorted(live):
+            snapshot.open.append(number(entry[-1]))
+        for key in closed_set:
+            snapshot.closed.append(key)
+            snapshot.closed_costs.append(g_score[key])
+        return snapshot
+
+    def restore(self, problem: Problem, h: Callable[[Node], int]) -> tuple[OpenList, dict[int, int], set[int], int]:
+        """
+        A function to rebuild the state of the search from this snapshot.
+
+        Parameters:
+            problem (Problem): The Problem being solved.
+
+            h (Callable[[Node], int]): The heuristic of the search.
+
+        Returns:
+            tuple[OpenList, dict[int, int], set[int], int]: The open list, g-values,
+                closed set and number of Nodes considered.
+        """
+
+        board: Board = problem.board
+        nodes: list[Node] = []
+        for key, parent, action, cost in zip(self.keys, self.parents, self.actions, self.costs):
+            nodes.append(board.node(key, nodes[parent] if parent >= 0 else None, Direction(action), cost))
+        frontier = OpenList(self.header["tie_break"])
+        g_score: dict[int, int] = dict(zip(self.closed, self.closed_costs))
+        for i in self.open:
+            node = nodes[i]
+            node.h = h(node)
+            frontier.push(node, node.h)
+            g_score[node.key] = node.path_cost
+        return frontier, g_score, set(self.closed), self.header["n_count"]
+
+    def check(self, problem: Problem, heuristic: str, tie_break: str) -> None:
+        """
+        A function to check that this snapshot belongs to a search.
+
+        Parameters:
+            problem (Problem): The Problem being solved.
+
+            heuristic (str): The name of the heuristic function.
+
+            tie_break (str): The tie-breaking policy of the open list.
+
+        Raises:
+            ValueError: When the snapshot is of another problem, heuristic or policy.
+        """
+
+        board: Board = problem.board
+        expected = {
+            "size": board.size,
+            "initial": board.format_key(board.node(problem.initial).key),
+            "goal": board.format_key(problem.goal_key),
+            "heuristic": heuristic,
+            "tie_break": tie_break,
+        }
+        for name, value in expected.items():
+            if self.header.get(name) != value:
+                raise ValueError(f"Checkpoint is of another search ({name}: {self.header.get(name)}, not {value}).")
+
+    def save(self, path: str) -> None:
+        """
+        A function to save this snapshot to a file.
+
+        Parameters:
+            path (str): The file to write.
+        """
+
+        board: Board = Board.get(self.header["size"])
+        width: int = (board.cells * board.bits + 7) // 8
+        header = dict(self.header, nodes=len(self.keys), open=len(self.open), closed=len(self.closed))
+        payload = b"".join((
+            b"".join(key.to_bytes(width, "big") for key in self.keys),
+            self.parents.tobytes(),
+            self.actions.tobytes(),
+            self.costs.tobytes(),
+            self.open.tobytes(),
+            b"".join(key.to_bytes(width, "big") for key in self.closed),
+            self.closed_costs.tobytes(),
+        ))
+        # Write to a temporary file first so a partial snapshot never replaces a good one.
+        with open(path + ".tmp", "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            file.write(zlib.compress(payload))
+        os.replace(path + ".tmp", path)
+
+    def load(path: str) -> "SearchCheckpoint":
+        """
+        A function to load a snapshot saved by save().
+
+        Parameters:
+            path (str): The file to read.
+
+        Returns:
+            SearchCheckpoint: The snapshot.
+
+        Raises:
+            ValueError: When the file is not a snapshot of a supported version.
+        """
+
+        with open(path, "rb") as file:
+            header = json.loads(file.readline())
+            payload = zlib.decompress(file.read())
+        if header.get("version") != SearchCheckpoint.VERSION:
+            raise ValueError(f"Checkpoint version ({header.get('version')}) not supported.")
+        snapshot = SearchCheckpoint({name: value for name, value in header.items()
+                                     if name not in ("nodes", "open", "closed")})
+        board: Board = Board.get(header["size"])
+        width: int = (board.cells * board.bits + 7) // 8
+        view = memoryview(payload)
+
+        def column(typecode: str, count: int) -> array:
+            nonlocal view
+            values = array(typecode)
+            values.frombytes(view[:count * values.itemsize])
+            view = view[count * values.itemsize:]
+            return values
+
+        def packed(count: int) -> list[int]:
+            nonlocal view
+            keys = [int.from_bytes(view[i:i + width], "big") for i in range(0, count * width, width)]
+            view = view[count * width:]
+            return keys
+
+        snapshot.keys = packed(header["nodes"])
+        snapshot.parents = column("q", header["nodes"])
+        snapshot.actions = column("B", header["nodes"])
+        snapshot.costs = column("I", header["nodes"])
+        snapshot.open = column("q", header["open"])
+        snapshot.closed = packed(header["closed"])
+        snapshot.closed_costs = column("I", header["closed"])
+        return snapshot
+
+class SearchStats:
+    """
+    Counters and timings collected inside a search when instrumentation is on.
+
+    Solvers only touch a SearchStats when Puzzle.instrumented is set, so an
+    uninstrumented search runs the same loop with the original heuristic and
+    expand functions.
+
+    Attributes:
+        algorithm (str): The search that collected the counters.
+
+        nodes_considered (int): The number of Nodes considered.
+
+        expansions (int): The number of Nodes expanded.
+
+        pushes (int): The number of Nodes added to the frontier.
+
+        pops (int): The number of Nodes taken from the frontier.
+
+        closed_hits (int): The number of popped Nodes that were already closed.
+
+        duplicates (int): The number of children dropped because their state was already reached as cheaply.
+
+        reopened (int): The number of children that improved the cost of an already closed state.
+
+        heuristic_calls (int): The number of heuristic evaluations, counting the
+            incremental updates of h(n) from a parent's h(n) (see Board.heuristic_deltas).
+
+        nodes_created (int): The number of child Nodes built by expansions.
+
+        h_seconds (float): The time spent in full evaluations of the heuristic (an
+            incremental update is part of building the child, in node_init_seconds).
+
+        expand_seconds (float): The time spent in Problem.expand.
+
+        node_init_seconds (float): The part of expand_seconds spent building child Nodes.
+
+        peak_frontier (int): The largest size of the frontier.
+
+        peak_closed (int): The largest size of the closed set.
+    """
+
+    def __init__(self, algorithm: str) -> None:
+        """
+        A constructor for this SearchStats.
+
+        Parameters:
+            algorithm (str): The search that collects the counters.
+        """
+
+        self.algorithm: str = algorithm
+        self.nodes_considered: int = 0
+        self.expansions: int = 0
+        self.pushes: int = 0
+        self.pops: int = 0
+        self.closed_hits: int = 0
+        self.duplicates: int = 0
+        self.reopened: int = 0
+        self.heuristic_calls: int = 0
+        self.nodes_created: int = 0
+        self.h_seconds: float = 0.0
+        self.expand_seconds: float = 0.0
+        self.node_init_seconds: float = 0.0
+        self.peak_frontier: int = 0
+        self.peak_closed: int = 0
+
+    def wrap_heuristic(self, h: Callable[[Node], int]) -> Callable[[Node], int]:
+        """
+        A function to wrap a heuristic so that its calls are counted and timed.
+
+        Parameters:
+            h (Callable[[Node], int]): The heuristic.
+
+        Returns:
+            Callable[[Node], int]: The instrumented heuristic.
+        """
+
+        def timed_h(node: Node) -> int:
+            start_time = time.perf_counter()
+            value = h(node)
+            self.h_seconds += time.perf_counter() - start_time
+            self.heuristic_calls += 1
+            return value
+
+        return timed_h
+
+    def wrap_expand(self, problem: Problem) -> Callable[[Node], list[Node]]:
+        """
+        A function to give an expand function for a Problem that is counted and timed.
+
+        Parameters:
+            problem (Problem): The Problem whose Nodes are expanded.
+
+        Returns:
+            Callable[[Node], list[Node]]: The instrumented expand function.
+        """
+
+        def timed_expand(node: Node, deltas: list = None) -> list[Node]:
+            start_time = time.perf_counter()
+            children: list[Node] = []
+            # The same children as Problem.expand, timing each constructor.
+            for dir, target in node.MOVES[node.b_index]:
+                init_time = time.perf_counter()
+                children.append(node._swap(dir, target, deltas))
+                self.node_init_seconds += time.perf_counter() - init_time
+            self.expand_seconds += time.perf_counter() - start_time
+            self.expansions += 1
+            self.nodes_created += len(children)
+            if deltas is not None:
+                # Every child got h(n) from the delta tables instead of the heuristic.
+                self.heuristic_calls += len(children)
+            return children
+
+        return timed_expand
+
+    def observe(self, frontier_size: int, closed_size: int) -> None:
+        """
+        A function to update the peak frontier and closed set sizes.
+
+        Parameters:
+            frontier_size (int): The current size of the frontier.
+
+            closed_size (int): The current size of the closed set.
+        """
+
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if closed_size > self.peak_closed:
+            self.peak_closed = closed_size
+
+    def as_dict(self) -> dict[str, int | float | str]:
+        """
+        A function to export the counters of this search.
+
+        Returns:
+            dict[str, int | float | str]: The counters and timings by name.
+        """
+
+        return dict(vars(self))
+
+class Puzzle:
+    """
+    A struct for holding the puzzle state.
+
+    Class Attributes:
+        state (list[int]):
+            A list representing the current state of the 8-puzzle.
+
+        is_valid (bool):
+            A bool representing the 
+
+        max_nodes (int | float):
+            An integer representing the maximium number of Nodes
+            to be searched in A* or beam search. Default is math.inf.
+
+        cache (SolutionCache):
+            The cache of results in front of Puzzle.solve. Disabled (capacity 0)
+            by default, so timed solves measure searches rather than cache hits.
+
+        instrumented (bool):
+            Whether A* and beam search collect a SearchStats (and IDA* traces
+            its peak memory). Default is False.
+
+        last_stats (SearchStats | None):
+            The SearchStats of the last instrumented search (None after a cache hit).
+
+        compact (bool):
+            Whether A* and beam search keep their closed states in a VisitedSet
+            bitmap instead of a set (bounded memory). Default is False.
+
+        symmetry (bool):
+            Whether a state is solved through the representative of it and its
+            mirror (see Symmetry), so the two share cached results, and the pattern
+            database takes the larger of their estimates. Default is False.
+    """
+
+    state: list[int] = []
+    board: Board = Node.BOARD
+    is_valid: bool = False
+    is_solvable: bool = False
+    max_nodes: int | float = math.inf
+    cache: SolutionCache = SolutionCache(0)
+    instrumented: bool = False
+    last_stats: SearchStats | None = None
+    compact: bool = False
+    symmetry: bool = False
+
+    def action(cmd: str) -> None:
+        """
+        A function to map a command string to a corresponding puzzle function.
+        
+        Parameters:
+            command (str):
+                A string representing a command to execute on this puzzle.
+        """
+
+        Puzzle.execute(parse_command(cmd))
+
+    def execute(command: "Command"):
+        """
+        A function to run a parsed command on this puzzle.
+
+        Parameters:
+            command (Command): The command to run.
+
+        Returns:
+            The value returned by the solver for solve commands, otherwise None.
+        """
+
+        match command.opcode:
+            case Opcode.SET_STATE:
+                Puzzle.set_state(command.args[0])
+            case Opcode.PRINT_STATE:
+                Puzzle.print_state()
+            case Opcode.MOVE:
+                Puzzle.move(command.args[0])
+            case Opcode.RANDOMIZE:
+                Puzzle.randomize_state(command.args[0])
+            case Opcode.SOLVE:
+                if Puzzle.is_valid and not Puzzle.is_solvable:
+                    return Puzzle.reject_unsolvable()
+                algorithm, heuristic, k, options = command.args
+                problem = Problem(initial=Puzzle.board.format(Puzzle.state), goal=Puzzle.board.goal)
+                return Puzzle.solve(problem, algorithm, heuristic=heuristic, k=k, options=options)
+            case Opcode.MAX_NODES:
+                Puzzle.set_max_nodes(command.args[0])
+            case Opcode.ERROR:
+                print(command.args[0])
+
+    def set_state(state: str) -> None:
+        """
+        A function to set and validate the state of the puzzle with a new state.
+
+        Parameters: 
+            state (str):
+                A string representing a state in the form "xxx xxx xxx" where each
+                value x is a number from [0, 9), or any N×N state read by Board.parse
+                (e.g. "0123 4567 89ab cdef" for the 15-puzzle).
+
+        Raises:
+            ValueError:
+                When the given input state does not meet the requirements specified
+                in the parameter description.
+        """
+
+        # Read the tiles and the board size from the input.
+        try:
+            board: Board = Board.of(state)
+        except ValueError:
+            Puzzle.is_valid = False
+            raise ValueError("A state with an invalid length was passed to the puzzle.")
+        state: list[int] = Board.parse(state)
+
+        # Validate the values of the proposed input state.
+        try:
+            board.validate(state)
+        except ValueError:
+            Puzzle.is_valid = False
+            raise
+        
+        # Update the puzzle state (moves never change whether it is solvable).
+        Puzzle.state = state
+        Puzzle.board = board
+        Puzzle.is_valid = True
+        Puzzle.is_solvable = board.solvable(state, list(range(board.cells)))
+
+    def print_state() -> None:
+        if Puzzle.is_valid:
+            # One quoted line per row, as pprint wraps the 3×3 state.
+            size = Puzzle.board.size
+            rows = [" ".join(str(i) for i in Puzzle.state[r:r + size]) for r in range(0, len(Puzzle.state), size)]
+            print("(" + "\n ".join(repr(row + " ") for row in rows[:-1]) + "\n " + repr(rows[-1]) + ")")
+
+    def move(direction: Direction) -> None:
+        """
+        A function to move the blank tile in the puzzle.
+
+        Parameters:
+            move (Direction):
+                An integer representing the desired direction of movement for the
+                blank tile.
+
+        Raises:
+            RuntimeError:
+                When the direction of movement is not possible for the blank tile.
+            
+            ValueError:
+                When the given move direction does not exist (i.e. not Direction.UP,
+                Direction.DOWN, Direction.LEFT, or Direction.RIGHT).
+        """
+
+        # Validate input.
+        if (type(direction) is not Direction or
+            direction is Direction.NONE):
+            raise ValueError("Invalid input argument.")
+
+        # Check is the puzzle state is set.
+        if Puzzle.is_valid:
+            # Get the index of the blank tile.
+            b_index: int = Puzzle.state.index(0)
+            if direction.value & Puzzle.board.validity[b_index]:
+                # Swap blank tile in a given direction.
+                Puzzle.__swap(b_index, direction)
+            else: 
                 raise RuntimeError("Cannot move blank tile in given direction.")
     
     def __swap(b_index: int, direction: Direction) -> None:
         state = Puzzle.state
-        match direction:
-            case Direction.UP:
-                state[b_index], state[b_index-3] = state[b_index-3], state[b_index]
-            case Direction.LEFT:
-                state[b_index], state[b_index-1] = state[b_index-1], state[b_index]
-            case Direction.DOWN:
-                state[b_index], state[b_index+3] = state[b_index+3], state[b_index]
-            case Direction.RIGHT:
-                state[b_index], state[b_index+1] = state[b_index+1], state[b_index]
+        target = b_index + Puzzle.board.offsets[direction]
+        state[b_index], state[target] = state[target], state[b_index]
                 
     def randomize_state(n: int) -> None:
         """
@@ -339,12 +2119,13 @@ class Puzzle:
         # Set seed.
         random.seed("axw582")
         if Puzzle.is_valid:
-            # Move n times.
+            state, moves = Puzzle.state, Puzzle.board.moves
+            b_index: int = state.index(0)
+            # Move n times (the valid moves of each blank index are in Direction order).
             for _ in range(n):
-                # Get a list of valid directions for a given index of blank tile.
-                b_index: int = Puzzle.state.index(0)
-                d_list: list[Direction] = [d for d in Direction if d.value & VALIDITY_MATRIX[b_index]]
-                Puzzle.move(random.choice(d_list))
+                _, target = random.choice(moves[b_index])
+                state[b_index], state[target] = state[target], 0
+                b_index = target
 
     def misplaced_tiles(node: Node) -> int:
         """
@@ -357,12 +2138,14 @@ class Puzzle:
             int: The number of misplaced tiles.
         """
 
-        count = 0
-        for i, value in enumerate(node.state):
-            if value != i:
-                count += 1
-
-        return count
+        # Fields that differ from the goal are non-zero after the XOR; fold
+        # each field onto its lowest bit and count them.
+        board = node.BOARD
+        diff = node.key ^ board.goal_key
+        folded = diff
+        for bit in range(1, board.bits):
+            folded |= diff >> bit
+        return (folded & board.lsbs).bit_count()
 
     def manhattan_dist(node: Node) -> int:
         """
@@ -375,44 +2158,797 @@ class Puzzle:
             int: The Manhattan distance of the tiles.
         """
 
-        distance = 0
-        for i, value in enumerate(node.state):
-            # Get position of index.
-            x_i, y_i = i % 3, i // 3
-            # Get position of value.
-            x_v, y_v = value % 3, value // 3
-            # Add the Manhattan distance.
-            distance += abs(x_i - x_v) + abs(y_i - y_v)
+        return node.BOARD.manhattan(node.key)
+
+    def pattern_db(node: Node) -> int:
+        """
+        A function to estimate the distance to the goal with the additive pattern database.
+
+        Parameters:
+            node (Node): The node to analyze.
+
+        Returns:
+            int: The pattern database estimate.
+        """
+
+        lookup = PatternDatabase.get(node.BOARD).lookup
+        if Puzzle.symmetry:
+            return max(lookup(node.key), lookup(Symmetry.get(node.BOARD).mirror(node.key)))
+        return lookup(node.key)
+
+    def get_heuristic(name: str) -> Callable[[Node], int] | None:
+        """
+        A function to map a heuristic name to the corresponding heuristic.
+
+        Parameters:
+            name (str): The name of the heuristic ("h1", "h2" or "h3").
+
+        Returns:
+            Callable[[Node], int] | None: The heuristic, or None if the name is not recognized.
+        """
+
+        match name:
+            case "h1":
+                return Puzzle.misplaced_tiles
+            case "h2":
+                return Puzzle.manhattan_dist
+            case "h3":
+                return Puzzle.pattern_db
+        return None
+
+    def heuristic_deltas(h: Callable[[Node], int], board: Board) -> list | None:
+        """
+        A function to give the incremental form of a heuristic, if it has one.
+
+        Parameters:
+            h (Callable[[Node], int]): The heuristic.
+
+            board (Board): The Board of the puzzle.
+
+        Returns:
+            list | None: The delta tables of the heuristic (see Board.heuristic_deltas),
+                or None if it must be evaluated in full for every Node.
+        """
+
+        if h is Puzzle.misplaced_tiles:
+            return board.heuristic_deltas("h1")
+        if h is Puzzle.manhattan_dist:
+            return board.heuristic_deltas("h2")
+        return None
+
+    def solve(problem: Problem, algorithm: str, heuristic: str = "h2", k: int = None, options: dict = None):
+        """
+        A function to solve a Problem with the named algorithm.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            algorithm (str): The search algorithm ("a-star", "wa-star", "ida-star", "epea-star",
+                "hda-star", "bidirectional", "beam", "beam-batch" or "table").
+
+            heuristic (str): The name of the heuristic for A*, IDA*, bidirectional and batched beam search.
+
+            k (int): The beam width for beam search.
+
+            options (dict): Other parameters of the algorithm, e.g. {"weight": 2.0, "deadline_ms": 50}
+                for weighted A*, {"workers": 4} for HDA* or {"tie_break": "fifo", "duplicates": "drop"}
+                for beam search.
+
+        Returns:
+            The value returned by the solver, or "UNSOLVABLE" (without searching)
+            when the goal cannot be reached from the initial state.
+
+        Raises:
+            ValueError: When the algorithm or heuristic is not recognized.
+        """
+
+        Puzzle.last_stats = None
+        if not problem.is_solvable():
+            return Puzzle.reject_unsolvable()
+        options = options or {}
+        # With symmetry, a state is always solved through the representative of
+        # it and its mirror, so its output does not depend on which of the two
+        # was solved (and cached) first.
+        initial: str = problem.initial
+        symmetry: Symmetry | None = None
+        mirrored: bool = False
+        if Puzzle.symmetry and problem.goal_key == problem.board.goal_key:
+            symmetry = Symmetry.get(problem.board)
+            representative, mirrored = symmetry.canonical(problem.board.node(problem.initial).key)
+            initial = problem.board.format_key(representative)
+            if mirrored:
+                problem = Problem(initial, problem.goal)
+        # Only the options used by the algorithm belong in the cache key.
+        key = (initial, problem.goal, algorithm,
+               heuristic if algorithm in ("a-star", "wa-star", "ida-star", "epea-star", "hda-star", "bidirectional", "beam-batch")
+               else None,
+               k if algorithm in ("beam", "beam-batch") else None,
+               json.dumps(options, sort_keys=True) if options else None,
+               Puzzle.max_nodes)
+        if Puzzle.symmetry:
+            # The pattern database gives other estimates with symmetry.
+            key += ("symmetry",)
+        # Results under a deadline depend on the speed of the search, and checkpoints
+        # are files outside the cache, so neither is cached.
+        cached: bool = not (Puzzle.cache.capacity <= 0 or options.get("deadline_ms") is not None
+                            or "checkpoint" in options or "resume" in options)
+        if not cached and not mirrored:
+            return Puzzle._solve(problem, algorithm, heuristic, k, options)
+        entry = Puzzle.cache.get(key) if cached else None
+        if entry is None:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                result = Puzzle._solve(problem, algorithm, heuristic, k, options)
+            entry = (result, output.getvalue())
+            if cached:
+                Puzzle.cache.put(key, *entry)
+        if mirrored:
+            entry = symmetry.mirror_solution(*entry)
+        # Replay the output of the solve.
+        sys.stdout.write(entry[1])
+        return entry[0]
+
+    def reject_unsolvable() -> str:
+        """
+        A function to report a solve of an unsolvable state.
+
+        Returns:
+            str: The "UNSOLVABLE" status.
+        """
+
+        print("Unsolvable state: the goal cannot be reached.")
+        return "UNSOLVABLE"
+
+    def _solve(problem: Problem, algorithm: str, heuristic: str, k: int, options: dict):
+        match algorithm:
+            case "a-star":
+                h = Puzzle.get_heuristic(heuristic)
+                if h is None:
+                    raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+                return Puzzle.solve_astar(problem, h, "state",
+                                          options.get("checkpoint"), options.get("every"), options.get("resume"))
+            case "wa-star":
+                return Puzzle.solve_arastar(problem, heuristic, options.get("weight", 2.0), options.get("deadline_ms"))
+            case "beam":
+                return Puzzle.solve_beam(problem, Puzzle.manhattan_dist, k,
+                                         options.get("tie_break", "state"), options.get("duplicates", "keep"))
+            case "beam-batch":
+                return Puzzle.solve_beam_batch(problem, heuristic, k)
+            case "ida-star":
+                return Puzzle.solve_idastar(problem, heuristic)
+            case "epea-star":
+                return Puzzle.solve_epeastar(problem, heuristic)
+            case "hda-star":
+                return Puzzle.solve_hdastar(problem, heuristic, options.get("workers") or os.cpu_count() or 1)
+            case "bidirectional":
+                return Puzzle.solve_bidirectional(problem, heuristic)
+            case "table":
+                return Puzzle.solve_table(problem)
+        raise ValueError(f"Algorithm ({algorithm}) not recognized/implemented.")
+
+    def solve_astar(problem: Problem,
+                    h: Callable[[Node], int],
+                    tie_break: str = "state",
+                    checkpoint: str = None,
+                    every: int = None,
+                    resume: str = None):
+        """
+        A function to solve the puzzle with A* search.
+
+        With a checkpoint file, the search saves a SearchCheckpoint every
+        `every` Nodes considered and when it runs out of nodes to consider.
+        Resuming from a checkpoint continues that search (with the Nodes it
+        already considered counted against the max nodes) instead of starting
+        over from the initial state.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            h (Callable[[Node], int]): The heuristic to guide the search.
+
+            tie_break (str): How Nodes with equal f(n) are ordered (see OpenList).
+
+            checkpoint (str): A file to save snapshots of the search to.
+
+            every (int): The number of Nodes considered between snapshots (only
+                when out of nodes if None).
 
-        return distance
+            resume (str): A file to resume the search from.
+
+        Raises:
+            ValueError: When checkpoints are used in compact mode, or the file to
+                resume from is of another search.
+        """
+
+        # The heuristic is recorded in checkpoints by name (before instrumentation wraps it).
+        heuristic: str = h.__name__
+        # Children of a Node get h(n) from their parent's h(n) where possible.
+        deltas: list | None = Puzzle.heuristic_deltas(h, problem.board)
+        # Instrumentation swaps in counted versions of h and expand.
+        stats: SearchStats | None = None
+        expand: Callable[[Node], list[Node]] = problem.expand
+        if Puzzle.instrumented:
+            stats = Puzzle.last_stats = SearchStats("a-star")
+            h = stats.wrap_heuristic(h)
+            expand = stats.wrap_expand(problem)
 
-    def solve_astar(problem: Problem, h: Callable[[Node], int]):
         # Define the initial Node.
-        node: Node = Node(state=problem.initial)
-        # Declare the frontier.
-        frontier: list[Node] = []
-        heapq.heappush(frontier, (0, node))
-        # Track closed states.
-        closed_set: set[Node] = set()
-
-        # Store any Node's cheapest cost.
-        g_score: dict[Node, int] = dict()
-        g_score[node] = 0
-        node.path_cost = 0
-        # Store any Node's evaluation (i.e. f(n)=g(n)+h(n)), which is the current best guess.
-        f_score: dict[Node, int] = dict()
-        f_score[node] = h(node) + 0
+        node: Node = problem.board.node(problem.initial)
+        node.h = h(node)
+        root: int = node.key
+        # Track closed states (in a bitmap over ranks when Puzzle.compact is set).
+        compact: bool = Puzzle.compact and problem.board.size == 3
+        if compact and (checkpoint is not None or resume is not None):
+            raise ValueError("Checkpoints are not available in compact mode.")
+        if resume is not None:
+            snapshot = SearchCheckpoint.load(resume)
+            snapshot.check(problem, heuristic, tie_break)
+            frontier, g_score, closed_set, n_count = snapshot.restore(problem, h)
+        else:
+            # Declare the frontier.
+            frontier: OpenList = OpenList(tie_break)
+            frontier.push(node, node.h)
+            closed_set: set[int] | VisitedSet = VisitedSet() if compact else set()
 
-        # Track the number of Nodes considered.
-        n_count: int = 0
-        while len(frontier) > 0:
+            # Store any state's cheapest cost.
+            g_score: dict[int, int] | CostTable = CostTable({node.key: 0}) if compact else {node.key: 0}
+
+            # Track the number of Nodes considered.
+            n_count: int = 0
+        while frontier:
             # Pop the highest priority Node.
-            node: Node = heapq.heappop(frontier)[1]
+            node: Node = frontier.pop()
             # Check if the node is closed.
-            if node in closed_set:
+            if node.key in closed_set:
+                if stats is not None:
+                    stats.pops += 1
+                    stats.closed_hits += 1
                 continue
+            elif compact:
+                closed_set.add(node.key, node.action)
+            else:
+                closed_set.add(node.key)
+            # Check + update the number of Nodes considered.
+            if n_count < Puzzle.max_nodes:
+                n_count += 1
+            else:
+                print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+                if checkpoint is not None:
+                    # The popped Node was not considered, so it goes back on the open list.
+                    closed_set.discard(node.key)
+                    frontier.push(node, node.h)
+                    SearchCheckpoint.capture(problem, heuristic, frontier, g_score, closed_set, n_count).save(checkpoint)
+                    print("Checkpoint saved:", checkpoint)
+                break
+            if stats is not None:
+                stats.pops += 1
+                stats.nodes_considered = n_count
+
+            # Check if the goal has been reached.
+            if problem.is_goal(node):
+                # TODO Remove print later.
+                print("Nodes considered:", n_count)
+                if compact:
+                    node = closed_set.path(root, node.key)
+                return Puzzle.backtrace(node)
+
+            # For each child node of Node.
+            tentative_score: int = node.path_cost + 1
+            for child in expand(node, deltas):
+                if compact:
+                    # The closed set remembers the path, so expanded Nodes can be freed.
+                    child.parent = None
+                # Check if the path has improved or not.
+                if tentative_score < g_score.get(child.key, math.inf):
+                    # Update tables (a better path replaces the queued Node).
+                    g_score[child.key] = tentative_score
+                    if child.h is None:
+                        child.h = h(child)
+                    frontier.push(child, child.h)
+                    if stats is not None:
+                        stats.pushes += 1
+                        stats.reopened += child.key in closed_set
+                elif stats is not None:
+                    stats.duplicates += 1
+            if stats is not None:
+                stats.observe(len(frontier), len(closed_set))
+            if every is not None and checkpoint is not None and n_count % every == 0:
+                SearchCheckpoint.capture(problem, heuristic, frontier, g_score, closed_set, n_count).save(checkpoint)
+
+        return "FAILURE"
+
+    def solve_arastar(problem: Problem, heuristic: str, weight: float, deadline_ms: float = None):
+        """
+        A function to solve the puzzle with anytime repairing A* (ARA*).
+
+        A weighted A* search (f(n) = g(n) + w * h(n)) finds a first solution
+        quickly, at most w times longer than optimal. The weight is then
+        lowered and the search resumed, reusing its open list and g-values:
+        only states whose g(n) improved after they were closed are reopened.
+        This repeats until the solution is proven optimal, the deadline
+        passes or max_nodes is reached, and the best solution found is kept.
+
+        After each search, the suboptimality bound is min(w, cost / lowest
+        g(n) + h(n) over the open and reopened states), which needs an
+        admissible heuristic. The blank tile is left out of h1 and h2 for
+        this, since counting it can overestimate.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            heuristic (str): The name of the heuristic ("h1", "h2" or "h3").
+
+            weight (float): The initial weight of the heuristic (at least 1).
+
+            deadline_ms (float): The time to search for, in milliseconds (no limit if None).
+
+        Raises:
+            ValueError: When the weight is less than 1 or the heuristic is not recognized.
+        """
+
+        if weight < 1:
+            raise ValueError(f"Weight ({weight}) must be at least 1.")
+        h = Puzzle.get_heuristic(heuristic)
+        if h is None:
+            raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+        deadline: float = math.inf if deadline_ms is None else time.perf_counter() + deadline_ms / 1000
+        blank: list[int] = problem.board.blank_costs(heuristic)
+
+        node: Node = problem.board.node(problem.initial)
+        # Store any state's cheapest cost and its (admissible) heuristic value.
+        g_score: dict[int, int] = {node.key: 0}
+        h_score: dict[int, int] = {node.key: h(node) - blank[node.b_index]}
+        frontier: OpenList = OpenList()
+        frontier.push(node, weight * h_score[node.key])
+        closed_set: set[int] = set()
+        # Closed states whose g(n) improved during the current search.
+        inconsistent: dict[int, Node] = {}
+
+        best: Node | None = node if problem.is_goal(node) else None
+        bound: float = 1 if best is not None else math.inf
+        # Track the number of Nodes considered.
+        n_count: int = 0
+        stop: str | None = None
+        while best is None or bound > 1:
+            # Search until no queued Node can improve on the best solution.
+            while frontier and frontier.peek() < (best.path_cost if best is not None else math.inf):
+                node = frontier.pop()
+                # Check the deadline + update the number of Nodes considered.
+                if not n_count & 0xFF and time.perf_counter() > deadline:
+                    stop = "deadline"
+                elif n_count < Puzzle.max_nodes:
+                    n_count += 1
+                else:
+                    stop = "nodes"
+                if stop is not None:
+                    # Requeue the Node so that it still counts towards the bound.
+                    frontier.push(node, weight * h_score[node.key])
+                    break
+                closed_set.add(node.key)
+
+                tentative_score: int = node.path_cost + 1
+                for child in problem.expand(node):
+                    if tentative_score >= g_score.get(child.key, math.inf):
+                        continue
+                    g_score[child.key] = tentative_score
+                    if problem.is_goal(child):
+                        best = child
+                    elif child.key in closed_set:
+                        inconsistent[child.key] = child
+                    else:
+                        if child.key not in h_score:
+                            h_score[child.key] = h(child) - blank[child.b_index]
+                        frontier.push(child, weight * h_score[child.key])
+            if best is None:
+                break
+
+            # Some state on an optimal path is open or reopened with its optimal g(n).
+            pending: list[Node] = list(frontier.index.values()) + list(inconsistent.values())
+            lowest = min((n.path_cost + h_score[n.key] for n in pending), default=math.inf)
+            if stop is not None:
+                bound = min(bound, max(1.0, best.path_cost / lowest))
+                break
+            bound = min(weight, max(1.0, best.path_cost / lowest))
+            print(f"Solution d: {best.path_cost} (w: {weight:g}, bound: {bound:.3f}, nodes considered: {n_count})")
+
+            # Lower the weight and resume from the open and reopened states.
+            weight = max(1.0, min(weight - 0.5, bound))
+            frontier = OpenList()
+            for n in pending:
+                frontier.push(n, weight * h_score[n.key])
+            closed_set.clear()
+            inconsistent.clear()
+
+        if best is None:
+            if stop == "deadline":
+                print(f"Exceeded deadline: {deadline_ms:g} ms.")
+            elif stop == "nodes":
+                print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+            # Otherwise the search space is exhausted.
+            return "FAILURE"
+        print("Nodes considered:", n_count)
+        print("Suboptimality bound:", round(bound, 3))
+        return Puzzle.backtrace(best)
+
+    def backtrace(node: Node) -> None:
+        """
+        A function to print out the length of the path from the goal state 
+        to the root state and the path itself.
+
+        Parameters:
+            node (Node):
+                The Node to backtrace back to the root (a Node with no parent).
+        """
+
+        # Start with initial empty path.
+        path: list[str, str] = []
+
+        # Remap directions from end-to-start to start-to-end.
+        remap: dict[str, str] = {
+            "up": "down",
+            "left": "right",
+            "down": "up",
+            "right": "left",
+            "none": "end"
+        }
+
+        # Until we reach the initial Node.
+        while node:
+            # Add the node + subsequent action.
+            path.append((node.state_str, remap[node.action.name.lower()]))
+            # Update the current Node.
+            node = node.parent
+
+        path = path[:-1]
+        # Print the length of the solution path.
+        print("d:", len(path))
+        for item in path:
+            # Print each direction in the solution path.
+            print(item[-1])
+        return len(path), path
+
+    def solve_beam(problem: Problem,
+                   h: Callable[[Node], int],
+                   k: int,
+                   tie_break: str = "state",
+                   duplicates: str = "keep") -> None:
+        """
+        A function to solve the puzzle with beam search.
+
+        Each layer keeps the k best successors of the previous one, selected
+        with a BeamLayer. The default policies keep the original, unbounded
+        selection; "fifo" or "drop" hold only k Nodes per layer.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            h (Callable[[Node], int]): The heuristic.
+
+            k (int): The beam width.
+
+            tie_break (str): How Nodes with equal h(n) are ordered (see BeamLayer).
+
+            duplicates (str): How closed and repeated states are handled (see BeamLayer).
+        """
+
+        # Children of a Node get h(n) from their parent's h(n) where possible.
+        deltas: list | None = Puzzle.heuristic_deltas(h, problem.board)
+        # Instrumentation swaps in counted versions of h and expand.
+        stats: SearchStats | None = None
+        expand: Callable[[Node], list[Node]] = problem.expand
+        if Puzzle.instrumented:
+            stats = Puzzle.last_stats = SearchStats("beam")
+            h = stats.wrap_heuristic(h)
+            expand = stats.wrap_expand(problem)
+
+        # Declare the frontier.
+        node: Node = problem.board.node(problem.initial)
+        node.h = h(node)
+        frontier: list[Node] = [node]
+        root: int = node.key
+        
+        # Tracked closed states (in a bitmap over ranks when Puzzle.compact is set).
+        compact: bool = Puzzle.compact and problem.board.size == 3
+        closed_set: set[int] | VisitedSet = VisitedSet() if compact else set()
+
+        # Track the number of Nodes considered.
+        n_count = 0
+        while len(frontier) > 0:
+            successors: BeamLayer = BeamLayer(k, closed_set, tie_break, duplicates)
+            pushed: int = stats.pushes if stats is not None else 0
+            # Generate the children of nodes in the frontier.
+            for node in frontier:
+                if stats is not None:
+                    stats.pops += 1
+                # Check if the node is closed.
+                if node.key in closed_set:
+                    if stats is not None:
+                        stats.closed_hits += 1
+                    continue
+                elif compact:
+                    closed_set.add(node.key, node.action)
+                else:
+                    closed_set.add(node.key)
+
+                # Check + update the number of Nodes considered.
+                if n_count < Puzzle.max_nodes:
+                    n_count += 1
+                else:
+                    print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+                    return "FAILURE"
+                if stats is not None:
+                    stats.nodes_considered = n_count
+
+                # Check if the goal has been reached.
+                if problem.is_goal(node):
+                    # TODO Remove print later.
+                    print("Nodes considered:", n_count)
+                    if compact:
+                        node = closed_set.path(root, node.key)
+                    return Puzzle.backtrace(node)
+                
+                # Add children of node to successor list.
+                for child in expand(node, deltas):
+                    if compact:
+                        # The closed set remembers the path, so expanded Nodes can be freed.
+                        child.parent = None
+                    if child.h is None:
+                        child.h = h(child)
+                    successors.push(child, child.h)
+                if stats is not None:
+                    stats.pushes = pushed + successors.counter
+                    stats.observe(len(successors), len(closed_set))
+            
+            # Get the k best successors.
+            frontier = successors.nodes()
+            if stats is not None:
+                stats.closed_hits += successors.closed_hits
+                stats.duplicates += successors.duplicates + len(frontier) - len({node.key for node in frontier})
+
+        return "FAILURE"
+
+    def solve_beam_batch(problem: Problem, heuristic: str, k: int):
+        """
+        A function to solve the puzzle with beam search, evaluating each layer as a batch.
+
+        Every layer is a 2-D array of boards (one row per Node). Children,
+        their heuristic values and their packed states are computed with
+        array operations, the k best successors are selected with argpartition,
+        and closed/duplicate Nodes are filtered in bulk with a bitmap over the
+        permutation rank of each board. Successors are ordered exactly as in
+        solve_beam (by h(n), then by state, then by the order they were
+        generated), so the Nodes considered and solution depth are the same.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            heuristic (str): The name of the heuristic ("h1" or "h2").
+
+            k (int): The beam width.
+        """
+
+        import numpy as np
+
+        board: Board = problem.board
+        if board.size != 3:
+            raise ValueError("Batched beam search only supports 3×3 boards.")
+        match heuristic:
+            case "h1":
+                table = np.array([[int(value != i and value < 9) for value in range(16)] for i in range(9)])
+            case "h2":
+                table = np.array([[board.distance(i, value) for value in range(16)] for i in range(9)])
+            case _:
+                raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+        # targets[b, d] is the index the blank moves to in direction d (-1 if invalid).
+        directions = [Direction.UP, Direction.LEFT, Direction.DOWN, Direction.RIGHT]
+        targets = np.full((9, 4), -1, dtype=np.int64)
+        for b_index in range(9):
+            for dir, target in board.moves[b_index]:
+                targets[b_index, directions.index(dir)] = target
+        positions = np.arange(9)
+        weights = np.array([1 << shift for shift in board.shifts], dtype=np.int64)
+        factorials = np.array([math.factorial(8 - i) for i in range(9)], dtype=np.int64)
+        later = np.triu(np.ones((9, 9), dtype=bool), 1)
+        closed = np.zeros(math.factorial(9), dtype=bool)
+
+        # The current layer, and the (parent index, direction) of each Node in every layer.
+        boards = np.array([[int(i) for i in problem.initial]], dtype=np.uint8)
+        history: list[tuple] = [(np.array([-1]), np.array([-1]))]
+
+        # Track the number of Nodes considered.
+        n_count = 0
+        while len(boards) > 0:
+            keys = boards.astype(np.int64) @ weights
+            # Only the first copy of a state that is not yet closed is considered.
+            _, first = np.unique(keys, return_index=True)
+            is_first = np.zeros(len(keys), dtype=bool)
+            is_first[first] = True
+            digits = ((boards[:, None, :] < boards[:, :, None]) & later).sum(axis=2)
+            ranks = digits @ factorials
+            selected = np.flatnonzero(is_first & ~closed[ranks])
+            closed[ranks[selected]] = True
+
+            # Check + update the number of Nodes considered.
+            remaining = Puzzle.max_nodes - n_count
+            goals = np.flatnonzero(keys[selected] == problem.goal_key)
+            if len(goals) > 0 and goals[0] < remaining:
+                n_count += int(goals[0]) + 1
+                # Rebuild the path to the goal as Nodes.
+                path: list[tuple[int, int]] = []
+                index, depth = int(selected[goals[0]]), len(history) - 1
+                while depth > 0:
+                    parents, actions = history[depth]
+                    path.append((index, int(actions[index])))
+                    index, depth = int(parents[index]), depth - 1
+                node = Node(state=problem.initial)
+                for _, action in reversed(path):
+                    node = node._swap(directions[action])
+                print("Nodes considered:", n_count)
+                return Puzzle.backtrace(node)
+            if len(selected) > remaining:
+                print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+                return "FAILURE"
+            n_count += len(selected)
+
+            # Generate the children of the considered Nodes, in generation order.
+            parents = boards[selected]
+            blanks = np.argmin(parents, axis=1)
+            moves = targets[blanks]
+            parent_index, action = np.nonzero(moves >= 0)
+            target = moves[parent_index, action]
+            children = parents[parent_index]
+            rows = np.arange(len(children))
+            children[rows, blanks[parent_index]] = children[rows, target]
+            children[rows, target] = 0
+            scores = table[positions, children].sum(axis=1)
+
+            # Get the k best successors ordered by (h, state), packed into one
+            # integer (h < 2^6 and states < 2^36).
+            priority = (scores.astype(np.int64) << 36) | (children.astype(np.int64) @ weights)
+            # solve_beam breaks exact ties by position in its successor heap,
+            # so replay the heap pushes when a successor was generated twice.
+            tie_break = rows
+            if len(np.unique(priority)) < len(rows):
+                heap: list[tuple[int, int]] = []
+                for item in zip(priority.tolist(), range(len(rows))):
+                    heapq.heappush(heap, item)
+                tie_break = np.empty_like(rows)
+                tie_break[[i for _, i in heap]] = rows
+            priority = priority * len(rows) + tie_break
+            if len(rows) > k:
+                best = np.argpartition(priority, k - 1)[:k]
             else:
-                closed_set.add(node)
+                best = rows
+            order = best[np.argsort(priority[best])]
+            boards = children[order]
+            history.append((selected[parent_index[order]], action[order]))
+
+        return "FAILURE"
+
+    def solve_hdastar(problem: Problem, heuristic: str, workers: int):
+        """
+        A function to solve the puzzle with hash-distributed A* (HDA*) across processes.
+
+        Every state is owned by one worker, chosen by a hash of the state, and
+        each worker keeps the open list, g-values and parents of its own states.
+        Children are sent to their owners in one batch per owner after every
+        round of expansions. Nodes with f(n) at least the cost of the best
+        solution found so far are pruned, and the search ends when every worker
+        is idle (no Node below that cost) and no batch is in flight, at which
+        point the best solution is optimal. The blank tile is left out of h1
+        and h2 for this check, since counting it can overestimate.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            heuristic (str): The name of the heuristic ("h1", "h2" or "h3").
+
+            workers (int): The number of worker processes.
+        """
+
+        h = Puzzle.get_heuristic(heuristic)
+        if h is None:
+            raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+        root: Node = problem.board.node(problem.initial)
+
+        # Idle flags and the in-flight count only change together under the lock,
+        # so the coordinator sees a consistent snapshot of them.
+        lock = multiprocessing.Lock()
+        shared = _HDAShared(lock,
+                            multiprocessing.Array("b", [1] * workers, lock=False),
+                            multiprocessing.Value("q", 1, lock=False),
+                            multiprocessing.Value("q", _HDA_NO_SOLUTION, lock=False),
+                            multiprocessing.Value("b", 0, lock=False),
+                            multiprocessing.Value("q", 0, lock=False))
+        inboxes = [multiprocessing.Queue() for _ in range(workers)]
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_hda_worker,
+                                             args=(i, problem, heuristic, Puzzle.max_nodes, inboxes, results, shared),
+                                             daemon=True)
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+
+        try:
+            inboxes[_hda_owner(root.key, workers)].put([(root.key, root.b_index, 0, h(root), None, 0)])
+            while True:
+                with lock:
+                    if shared.stop.value or (shared.in_flight.value == 0 and all(shared.idle)):
+                        shared.stop.value = shared.stop.value or 1
+                        break
+                time.sleep(0.001)
+
+            counts: list[int] = [0] * workers
+            for _ in range(workers):
+                i, n_count = results.get()
+                counts[i] = n_count
+            if shared.stop.value == 2:
+                print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+                return "FAILURE"
+            if shared.incumbent.value == _HDA_NO_SOLUTION:
+                return "FAILURE"
+
+            print("Nodes considered:", sum(counts))
+            print("Nodes considered per worker:", ", ".join(map(str, counts)))
+            # Ask the owner of each state on the path for its parent.
+            path: list[tuple[int, int]] = []
+            key: int | None = problem.goal_key
+            while key is not None:
+                inboxes[_hda_owner(key, workers)].put(key)
+                parent, action = results.get()
+                path.append((key, action))
+                key = parent
+            node: Node = None
+            for depth, (key, action) in enumerate(reversed(path)):
+                node = problem.board.node(key, node, Direction(action), depth)
+            return Puzzle.backtrace(node)
+        finally:
+            for inbox in inboxes:
+                inbox.put(None)
+            for process in processes:
+                process.join()
+
+    def solve_epeastar(problem: Problem, heuristic: str):
+        """
+        A function to solve the puzzle with (enhanced) partial-expansion A* (EPEA*).
+
+        An expansion only builds the children whose f(n) equals the stored
+        f-value F of the popped Node; the Node is then queued again with the
+        next larger f(n) among its other children, if there is one. For h1 and
+        h2 the change of f(n) of every move is read from the heuristic delta
+        tables before any child is built (EPEA*). The pattern database has no
+        delta tables, so its children are built and evaluated, but only those
+        with f(n) = F are queued (PEA*). Since h1 and h2 can drop by more than
+        the cost of a move, the first expansion of a Node also builds the
+        children with f(n) below F.
+
+        Parameters:
+            problem (Problem): The Problem to solve.
+
+            heuristic (str): The name of the heuristic ("h1", "h2" or "h3").
+        """
+
+        h = Puzzle.get_heuristic(heuristic)
+        if h is None:
+            raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+        board: Board = problem.board
+        shifts, mask = board.shifts, board.mask
+        # deltas[b][t][tile] is the change of h(n) when the blank moves from b to t.
+        deltas: list | None = Puzzle.heuristic_deltas(h, board)
+
+        node: Node = board.node(problem.initial)
+        node.h = h(node)
+        frontier: OpenList = OpenList()
+        frontier.push(node, node.h)
+        g_score: dict[int, int] = {node.key: 0}
+
+        # Track the number of expansions and of children built and queued.
+        n_count: int = 0
+        generated: int = 0
+        while frontier:
+            # The stored f-value of the popped Node may be above its f(n).
+            stored: int = frontier.peek()
+            node = frontier.pop()
             # Check + update the number of Nodes considered.
             if n_count < Puzzle.max_nodes:
                 n_count += 1
@@ -422,104 +2958,302 @@ class Puzzle:
 
             # Check if the goal has been reached.
             if problem.is_goal(node):
-                # TODO Remove print later.
                 print("Nodes considered:", n_count)
+                print("Nodes generated:", generated)
                 return Puzzle.backtrace(node)
 
-            # For each child node of Node.
-            for child in problem.expand(node):
-                # Add path cost up to child node to the tentative score.
-                tentative_score: int = g_score.get(node, math.inf) + 1
-                # Check if the path has improved or not.
-                if child not in g_score or tentative_score < g_score[child]:
-                    # Update tables.
-                    child.parent = node
-                    g_score[child] = tentative_score
-                    f_score[child] = tentative_score + h(child)
-                    if child not in frontier:
-                        heapq.heappush(frontier, (f_score[child], child))
+            # Build the children whose change of f(n) is the stored one.
+            step: int = stored - node.path_cost - node.h
+            next_step: float = math.inf
+            tentative_score: int = node.path_cost + 1
+            for dir, target in node.MOVES[node.b_index]:
+                if deltas is not None:
+                    tile: int = (node.key >> shifts[target]) & mask
+                    change: int = 1 + deltas[node.b_index][target][tile]
+                else:
+                    child: Node = node._swap(dir, target)
+                    child.h = h(child)
+                    change = 1 + child.h - node.h
+                if change != step and not (step == 0 and change < 0):
+                    if step < change < next_step:
+                        next_step = change
+                    continue
+                # Check if the path has improved or not (before building the child, if possible).
+                if deltas is not None:
+                    key: int = node.key - (tile << shifts[target]) + (tile << shifts[node.b_index])
+                    if tentative_score >= g_score.get(key, math.inf):
+                        continue
+                    child = node._swap(dir, target, deltas)
+                elif tentative_score >= g_score.get(child.key, math.inf):
+                    continue
+                g_score[child.key] = tentative_score
+                frontier.push(child, child.h)
+                generated += 1
+            # Queue the Node again for the rest of its children.
+            if next_step < math.inf:
+                frontier.push(node, node.h + next_step)
 
         return "FAILURE"
-    
-    def backtrace(node: Node) -> None:
+
+    def solve_idastar(problem: Problem, heuristic: str):
         """
-        A function to print out the length of the path from the goal state 
-        to the root state and the path itself.
+        A function to solve the puzzle with iterative-deepening A* search.
+
+        The search keeps a single packed state that is updated in place by
+        each move and undone on backtracking, so no Nodes are built while
+        searching and memory stays proportional to the search depth. The
+        h1/h2 values are updated from the moved tile (and blank) alone. The
+        deepest path searched is always printed as the memory measure, and the
+        peak memory traced during the search is printed for instrumented solves.
 
         Parameters:
-            node (Node):
-                The Node to backtrace back to the root (a Node with no parent).
+            problem (Problem): The Problem to solve.
+
+            heuristic (str): The name of the heuristic ("h1", "h2" or "h3").
         """
 
-        # Start with initial empty path.
-        path: list[str, str] = []
+        h = Puzzle.get_heuristic(heuristic)
+        if h is None:
+            raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+        board: Board = problem.board
+        moves, shifts, mask = board.moves, board.shifts, board.mask
+        # deltas[b][t][tile] is the change of h(n) when the blank moves from b to t.
+        deltas = Puzzle.heuristic_deltas(h, board)
+        if deltas is None:
+            lookup = PatternDatabase.get(board).lookup
+            if Puzzle.symmetry:
+                lookup = Symmetry.get(board).max_lookup(lookup)
+
+        root: Node = board.node(problem.initial)
+        key: int = root.key
+        b_index: int = root.b_index
+        goal_key: int = problem.goal_key
+        # The directions taken from the initial state to the current state.
+        path: list[Direction] = []
+        found, exceeded = -1, -2
 
-        # Remap directions from end-to-start to start-to-end.
-        remap: dict[str, str] = {
-            "up": "down",
-            "left": "right",
-            "down": "up",
-            "right": "left",
-            "none": "end"
-        }
+        # Track the number of Nodes considered.
+        n_count: int = 0
+        # Track the deepest path searched; it bounds the memory in use.
+        max_depth: int = 0
+
+        def search(g: int, h_value: int, bound: int, previous: int) -> int:
+            """
+            Returns found, exceeded, or the smallest f(n) over the bound.
+            """
+
+            nonlocal key, b_index, n_count, max_depth
+            f = g + h_value
+            if f > bound:
+                return f
+            # Check + update the number of Nodes considered.
+            if n_count < Puzzle.max_nodes:
+                n_count += 1
+            else:
+                return exceeded
+            if g > max_depth:
+                max_depth = g
+            # Check if the goal has been reached.
+            if key == goal_key:
+                return found
+
+            minimum = math.inf
+            blank = b_index
+            for dir, target in moves[blank]:
+                # Never undo the previous move.
+                if target == previous:
+                    continue
+                tile = (key >> shifts[target]) & mask
+                delta = (tile << shifts[blank]) - (tile << shifts[target])
+                key += delta
+                b_index = target
+                if deltas is None:
+                    child_h = lookup(key)
+                else:
+                    child_h = h_value + deltas[blank][target][tile]
+                path.append(dir)
+                t = search(g + 1, child_h, bound, blank)
+                if t < 0:
+                    return t
+                # Undo the move.
+                path.pop()
+                key -= delta
+                b_index = blank
+                minimum = min(minimum, t)
+            return minimum
+
+        # Tracing allocations slows the search down several times, so the peak
+        # memory is only measured when Puzzle.instrumented is set.
+        measure: bool = Puzzle.instrumented
+        started: bool = measure and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        if measure:
+            tracemalloc.reset_peak()
+        try:
+            h_root = bound = h(root)
+            while True:
+                t = search(0, h_root, bound, -1)
+                if t < 0 or t == math.inf:
+                    break
+                bound = t
+            peak: int | None = tracemalloc.get_traced_memory()[1] if measure else None
+        finally:
+            if started:
+                tracemalloc.stop()
+
+        if t == exceeded:
+            print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+            return "FAILURE"
+        if t != found:
+            return "FAILURE"
+
+        node = root
+        for dir in path:
+            node = node._swap(dir)
+        print("Nodes considered:", n_count)
+        print("Max depth:", max_depth)
+        if peak is not None:
+            print("Peak memory:", peak, "bytes")
+        return Puzzle.backtrace(node)
+
+    def solve_bidirectional(problem: Problem, heuristic: str = None):
+        """
+        A function to solve the puzzle searching forward from the initial state
+        and backward from the goal state at the same time.
+
+        Each side is an A* search towards the other side's root (uniform cost
+        without a heuristic), with its own open list and a hash of reached
+        states. The side with the smaller open list is expanded first. When a
+        state is reached by both sides, the combined path gives an upper
+        bound mu, and the search stops once no cheaper path can exist, that
+        is, once mu <= max(lowest f forward, lowest f backward, lowest g
+        forward + lowest g backward + 1). The heuristics ignore the blank
+        tile, so they are admissible towards any target state.
 
-        # Until we reach the initial Node.
-        while node:
-            # Add the node + subsequent action.
-            path.append((node.state_str, remap[node.action.name.lower()]))
-            # Update the current Node.
-            node = node.parent
+        Parameters:
+            problem (Problem): The Problem to solve.
 
-        path = path[:-1]
-        # Print the length of the solution path.
-        print("d:", len(path))
-        for item in path:
-            # Print each direction in the solution path.
-            print(item[-1])
-        return len(path), path
+            heuristic (str): The name of the heuristic ("h1", "h2" or None).
+        """
 
-    def solve_beam(problem: Problem, h: Callable[[Node], int], k: int) -> None:
-        # Declare the frontier.
-        frontier: list[Node] = []
-        heapq.heappush(frontier, (0, Node(state=problem.initial)))
-        
-        # Tracked closed states.
-        closed_set: set[Node] = set()
+        board: Board = problem.board
+        values = range(1 << board.bits)
 
-        # Track the number of Nodes considered.
-        n_count = 0
-        while len(frontier) > 0:
-            successors: list[Node] = []
-            # Generate the children of nodes in the frontier.
-            for node in frontier:
-                node: Node = node[1]
-                # Check if the node is closed.
-                if node in closed_set:
+        def costs_to(target: str) -> list[list[int]]:
+            # costs[i][value] is the cost of a tile at index i given its index in the target.
+            position = {value: i for i, value in enumerate(Board.parse(target))}
+            match heuristic:
+                case None:
+                    return [[0] * len(values) for _ in range(board.cells)]
+                case "h1":
+                    return [[int(value in position and value != 0 and position[value] != i)
+                             for value in values] for i in range(board.cells)]
+                case "h2":
+                    return [[board.distance(i, position[value]) if value in position and value != 0 else 0
+                             for value in values] for i in range(board.cells)]
+            raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+
+        def estimate(key: int, costs: list[list[int]]) -> int:
+            return sum(costs[i][(key >> shift) & board.mask] for i, shift in enumerate(board.shifts))
+
+        # Each side: (open list, reached Nodes, open Nodes per g(n), heuristic costs).
+        roots = (board.node(problem.initial), board.node(problem.goal))
+        sides = []
+        for root, target in zip(roots, (problem.goal, problem.initial)):
+            costs = costs_to(target)
+            frontier = OpenList()
+            frontier.push(root, estimate(root.key, costs))
+            sides.append((frontier, {root.key: root}, {0: 1}, costs))
+
+        best: int | float = math.inf
+        meeting: int = roots[0].key if roots[0].key == roots[1].key else None
+        if meeting is not None:
+            best = 0
+
+        # Track the number of Nodes considered on each side.
+        n_counts: list[int] = [0, 0]
+        while sides[0][0] and sides[1][0]:
+            # Stop once no path cheaper than the best meeting can exist.
+            g_min = sum(min(g for g, count in side[2].items() if count) for side in sides)
+            if best <= max(sides[0][0].peek(), sides[1][0].peek(), g_min + 1):
+                break
+
+            # Expand the side with the smaller open list.
+            s = 0 if len(sides[0][0]) <= len(sides[1][0]) else 1
+            frontier, reached, g_counts, costs = sides[s]
+            other = sides[1 - s][1]
+            node: Node = frontier.pop()
+            g_counts[node.path_cost] -= 1
+
+            # Check + update the number of Nodes considered.
+            if n_counts[0] + n_counts[1] < Puzzle.max_nodes:
+                n_counts[s] += 1
+            else:
+                print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+                return "FAILURE"
+
+            for child in problem.expand(node):
+                previous = reached.get(child.key)
+                if previous is not None and previous.path_cost <= child.path_cost:
                     continue
-                else:
-                    closed_set.add(node)
+                if previous is not None and previous in frontier:
+                    g_counts[previous.path_cost] -= 1
+                reached[child.key] = child
+                g_counts[child.path_cost] = g_counts.get(child.path_cost, 0) + 1
+                frontier.push(child, estimate(child.key, costs))
+                # Check if the sides have met.
+                if child.key in other and child.path_cost + other[child.key].path_cost < best:
+                    best = child.path_cost + other[child.key].path_cost
+                    meeting = child.key
+
+        if meeting is None:
+            return "FAILURE"
+
+        # Follow the backward side from the meeting state to the goal.
+        opposite = {Direction.UP: Direction.DOWN, Direction.DOWN: Direction.UP,
+                    Direction.LEFT: Direction.RIGHT, Direction.RIGHT: Direction.LEFT}
+        node = sides[0][1][meeting]
+        backward = sides[1][1][meeting]
+        while backward.parent is not None:
+            node = node._swap(opposite[backward.action])
+            backward = backward.parent
+        print("Nodes considered:", n_counts[0] + n_counts[1])
+        print("Forward nodes considered:", n_counts[0])
+        print("Backward nodes considered:", n_counts[1])
+        return Puzzle.backtrace(node)
+
+    def solve_table(problem: Problem):
+        """
+        A function to solve the puzzle by walking down the exact distance table.
 
-                # Check + update the number of Nodes considered.
-                if n_count < Puzzle.max_nodes:
-                    n_count += 1
-                else:
-                    print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
-                    return "FAILURE"
+        From each Node, the first child one move closer to the goal is taken,
+        so an optimal solution is found after considering d + 1 Nodes.
 
-                # Check if the goal has been reached.
-                if problem.is_goal(node):
-                    # TODO Remove print later.
-                    print("Nodes considered:", n_count)
-                    return Puzzle.backtrace(node)
-                
-                # Add children of node to successor list.
-                for child in problem.expand(node):
-                    heapq.heappush(successors, (h(child), child))
-            
-            # Get the k best successors.
-            frontier = heapq.nsmallest(k, successors)
+        Parameters:
+            problem (Problem): The Problem to solve (its goal must be 012345678).
+        """
 
-        return "FAILURE"
+        if problem.goal_key != Node.BOARD.goal_key:
+            raise ValueError("The distance table only supports the goal 012345678.")
+
+        node: Node = Node(state=problem.initial)
+        distance: int | None = DistanceTable.distance(node.key)
+        if distance is None:
+            return "FAILURE"
+
+        # Track the number of Nodes considered.
+        n_count: int = 1
+        while distance > 0:
+            if n_count >= Puzzle.max_nodes:
+                print(f"Exceeded max nodes to consider: {Puzzle.max_nodes}.")
+                return "FAILURE"
+            distance -= 1
+            node = next(child for child in problem.expand(node) if DistanceTable.distance(child.key) == distance)
+            n_count += 1
+
+        print("Nodes considered:", n_count)
+        return Puzzle.backtrace(node)
 
     def set_max_nodes(n: int | float = math.inf) -> None:
         """
@@ -540,35 +3274,783 @@ class Puzzle:
             raise ValueError(f"Input {n} is not a valid number.")
 
 
-# For command line parsing.
-import sys
+class Opcode(Enum):
+    """
+    An enum containing the commands of a command file.
+    """
 
-# For search timing purposes.
-import time
-is_timed: bool = False
+    SET_STATE = 0
+    PRINT_STATE = 1
+    MOVE = 2
+    RANDOMIZE = 3
+    SOLVE = 4
+    MAX_NODES = 5
+    TIME = 6
+    UNTIME = 7
+    ERROR = 8
+
+class Command(NamedTuple):
+    """
+    A command of a command file, parsed once into its opcode and arguments.
 
-if __name__ == "__main__":
+    Attributes:
+        opcode (Opcode): The command to run.
+
+        args (tuple): The parsed arguments, e.g. (algorithm, heuristic, k, options) for
+            Opcode.SOLVE or the message to print for Opcode.ERROR.
+    """
+
+    opcode: Opcode
+    args: tuple = ()
+
+def parse_command(cmd: str) -> Command | None:
+    """
+    A function to parse a command string.
+
+    Parameters:
+        cmd (str): A string representing a command to execute on the puzzle.
+
+    Returns:
+        Command | None: The parsed command, or None for a blank line.
+    """
+
+    # Remove whitespace and standardize command string.
+    args: list[str] = cmd.lower().strip().split()
+    if not args:
+        return None
+
+    if "untime" in args[0]:
+        return Command(Opcode.UNTIME)
+    elif "time" in args[0]:
+        return Command(Opcode.TIME)
+    elif "setstate" in args[0]:
+        # args = ["setstate", "xxx", "xxx", "xxx"]
+        # Get the puzzle sequence from the command (Board.parse reads the tiles).
+        return Command(Opcode.SET_STATE, (" ".join(args[1:]),))
+    elif "printstate" in args[0]:
+        return Command(Opcode.PRINT_STATE)
+    elif "move" in args[0]:
+        return Command(Opcode.MOVE, (Direction[args[1].upper()],))
+    elif "randomizestate" in args[0]:
+        return Command(Opcode.RANDOMIZE, (int(args[1]),))
+    elif "solve" in args[0]:
+        # args = ["solve", algorithm, heuristic or k (if applicable)]
+        if "wa-star" in args[1]:
+            # args = ["solve", "wa-star", weight, heuristic, deadline in ms (optional)]
+            if Puzzle.get_heuristic(args[3]) is None:
+                return Command(Opcode.ERROR, (f"Heuristic (f{args[3]}) not recognized/implemented.",))
+            options = {"weight": float(args[2])}
+            if len(args) > 4:
+                options["deadline_ms"] = float(args[4])
+            return Command(Opcode.SOLVE, ("wa-star", args[3], None, options))
+        elif "epea-star" in args[1]:
+            if Puzzle.get_heuristic(args[2]) is None:
+                return Command(Opcode.ERROR, (f"Heuristic (f{args[2]}) not recognized/implemented.",))
+            return Command(Opcode.SOLVE, ("epea-star", args[2], None, None))
+        elif "hda-star" in args[1]:
+            # args = ["solve", "hda-star", heuristic, "--workers", N (optional)]
+            if Puzzle.get_heuristic(args[2]) is None:
+                return Command(Opcode.ERROR, (f"Heuristic (f{args[2]}) not recognized/implemented.",))
+            options = None
+            if args[3:4] == ["--workers"] and len(args) > 4:
+                options = {"workers": int(args[4])}
+            return Command(Opcode.SOLVE, ("hda-star", args[2], None, options))
+        elif "ida-star" in args[1] or "a-star" in args[1]:
+            algorithm = "ida-star" if "ida-star" in args[1] else "a-star"
+            if Puzzle.get_heuristic(args[2]) is None:
+                return Command(Opcode.ERROR, (f"Heuristic (f{args[2]}) not recognized/implemented.",))
+            # args = ["solve", "a-star", heuristic, "--checkpoint", file, "--every", N, "--resume", file]
+            # (optional, with the file names in their original case)
+            options = {}
+            flags = cmd.strip().split()[3:]
+            if algorithm == "ida-star" and flags or len(flags) % 2:
+                return Command(Opcode.ERROR, (f"Options ({' '.join(flags)}) not recognized/implemented.",))
+            for flag, value in zip(flags[::2], flags[1::2]):
+                match flag.lower():
+                    case "--checkpoint" | "--resume":
+                        options[flag[2:].lower()] = value
+                    case "--every":
+                        options["every"] = int(value)
+                    case _:
+                        return Command(Opcode.ERROR, (f"Option ({flag}) not recognized/implemented.",))
+            return Command(Opcode.SOLVE, (algorithm, args[2], None, options or None))
+        elif "bidirectional" in args[1]:
+            heuristic = args[2] if len(args) > 2 else None
+            if heuristic is not None and heuristic not in ("h1", "h2"):
+                return Command(Opcode.ERROR, (f"Heuristic (f{args[2]}) not recognized/implemented.",))
+            return Command(Opcode.SOLVE, ("bidirectional", heuristic, None, None))
+        elif "beam-batch" in args[1]:
+            heuristic = args[3] if len(args) > 3 else "h2"
+            return Command(Opcode.SOLVE, ("beam-batch", heuristic, int(args[2]), None))
+        elif "beam" in args[1]:
+            # args = ["solve", "beam", k, tie-breaking and duplicate policies (optional)]
+            options = {}
+            for policy in args[3:]:
+                if policy in BeamLayer.TIE_BREAKS:
+                    options["tie_break"] = policy
+                elif policy in BeamLayer.DUPLICATES:
+                    options["duplicates"] = policy
+                else:
+                    return Command(Opcode.ERROR, (f"Beam policy ({policy}) not recognized/implemented.",))
+            return Command(Opcode.SOLVE, ("beam", None, int(args[2]), options or None))
+        elif "table" in args[1]:
+            return Command(Opcode.SOLVE, ("table", None, None, None))
+        return Command(Opcode.ERROR, (f"Algorithm (f{args[1]}) not recognized/implemented.",))
+    elif "maxnodes" in args[0]:
+        return Command(Opcode.MAX_NODES, (int(args[1]),))
+    return Command(Opcode.ERROR, (f"Action (f{args[0]}) not recognized/implemented.",))
+
+class Issue(NamedTuple):
+    """
+    A problem found by validating a batch before running it.
+
+    Attributes:
+        line (int): The line number of the command (or the index of the Problem).
+
+        text (str): The command (or "initial -> goal" for a Problem).
+
+        message (str): What is wrong with it.
+    """
+
+    line: int
+    text: str
+    message: str
+
+def validate_commands(lines: Iterable[str]) -> list[Issue]:
+    """
+    A function to check a command file without searching.
+
+    State changing commands are run (with the puzzle state restored after)
+    so that invalid states, invalid moves, unrecognized commands and solves
+    of unsolvable states are all found.
+
+    Parameters:
+        lines (Iterable[str]): The lines of the command file.
+
+    Returns:
+        list[Issue]: Every problem found, in line order.
+    """
+
+    issues: list[Issue] = []
+    saved = (list(Puzzle.state), Puzzle.board, Puzzle.is_valid, Puzzle.is_solvable)
+    try:
+        for number, line in enumerate(lines, 1):
+            text = line.strip()
+            try:
+                command = parse_command(line)
+            except (KeyError, IndexError, ValueError):
+                issues.append(Issue(number, text, "Command could not be parsed."))
+                continue
+            if command is None:
+                continue
+            match command.opcode:
+                case Opcode.ERROR:
+                    issues.append(Issue(number, text, command.args[0]))
+                case Opcode.SET_STATE | Opcode.MOVE | Opcode.RANDOMIZE:
+                    try:
+                        Puzzle.execute(command)
+                    except (RuntimeError, ValueError) as error:
+                        issues.append(Issue(number, text, str(error)))
+                case Opcode.SOLVE:
+                    if not Puzzle.is_valid:
+                        issues.append(Issue(number, text, "No valid state to solve."))
+                    elif not Puzzle.is_solvable:
+                        issues.append(Issue(number, text, "Unsolvable state: the goal cannot be reached."))
+    finally:
+        Puzzle.state, Puzzle.board, Puzzle.is_valid, Puzzle.is_solvable = saved
+    return issues
+
+def validate_problems(problems: Iterable[Problem]) -> list[Issue]:
+    """
+    A function to check Problems (with any goal states) without searching.
+
+    Parameters:
+        problems (Iterable[Problem]): The Problems to check.
+
+    Returns:
+        list[Issue]: Every Problem whose states are invalid or whose goal cannot be reached.
+    """
+
+    issues: list[Issue] = []
+    for index, problem in enumerate(problems):
+        text = f"{problem.initial} -> {problem.goal}"
+        try:
+            problem.board.validate(Board.parse(problem.initial))
+            problem.board.validate(Board.parse(problem.goal))
+        except ValueError as error:
+            issues.append(Issue(index, text, str(error)))
+            continue
+        if not problem.is_solvable():
+            issues.append(Issue(index, text, "Unsolvable state: the goal cannot be reached."))
+    return issues
+
+"""
+The incumbent of an HDA* search before any solution is found.
+"""
+_HDA_NO_SOLUTION: int = 1 << 62
+
+class _HDAShared(NamedTuple):
+    """
+    The state shared by the coordinator and the workers of an HDA* search.
+
+    Attributes:
+        lock (multiprocessing.Lock): Guards idle and in_flight (and the updates of incumbent and expanded).
+
+        idle (multiprocessing.Array): Whether each worker has no Node below the incumbent.
+
+        in_flight (multiprocessing.Value): The number of batches sent but not yet taken in.
+
+        incumbent (multiprocessing.Value): The cost of the best solution found.
+
+        stop (multiprocessing.Value): 0 while searching, 1 when finished, 2 when out of nodes.
+
+        expanded (multiprocessing.Value): The number of Nodes considered by all workers.
+    """
+
+    lock: object
+    idle: object
+    in_flight: object
+    incumbent: object
+    stop: object
+    expanded: object
+
+def _hda_owner(key: int, workers: int) -> int:
+    # Fibonacci hashing spreads neighbouring packed states across workers.
+    return (((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % workers
+
+def _hda_worker(i: int,
+                problem: Problem,
+                heuristic: str,
+                max_nodes: int | float,
+                inboxes: list,
+                results,
+                shared: _HDAShared) -> None:
+    """
+    A function to run one worker of an HDA* search (see Puzzle.solve_hdastar).
+
+    The inbox of a worker carries batches of children (lists of (key, b_index,
+    g, h, parent key, action) tuples) while searching, then a packed state
+    for every parent it is asked for, then None to exit.
+
+    Parameters:
+        i (int): The index of the worker.
+
+        problem (Problem): The Problem to solve.
+
+        heuristic (str): The name of the heuristic.
+
+        max_nodes (int | float): The maximum number of Nodes to consider in total.
+
+        inboxes (list[multiprocessing.Queue]): The inboxes of all workers.
+
+        results (multiprocessing.Queue): The queue of replies to the coordinator.
+
+        shared (_HDAShared): The shared state of the search.
+    """
+
+    board: Board = problem.board
+    h = Puzzle.get_heuristic(heuristic)
+    deltas: list | None = Puzzle.heuristic_deltas(h, board)
+    workers: int = len(inboxes)
+    inbox = inboxes[i]
+    lock, idle, in_flight, incumbent, stop, expanded = shared
+    goal_key: int = problem.goal_key
+    # The optimality check needs an admissible heuristic, so f(n) leaves the
+    # blank's term out (h(n) itself is kept to update the children incrementally).
+    blank: list[int] = board.blank_costs(heuristic)
+
+    g_score: dict[int, int] = {}
+    parents: dict[int, tuple[int | None, int]] = {}
+    # Entries are (f, h, key, g, b_index); ties prefer the deeper Node.
+    frontier: list[tuple] = []
+    outgoing: list[list[tuple]] = [[] for _ in range(workers)]
+
+    def take(batch: list[tuple]) -> None:
+        for key, b_index, g, h_value, parent, action in batch:
+            if g < g_score.get(key, math.inf):
+                g_score[key] = g
+                parents[key] = (parent, action)
+                heapq.heappush(frontier, (g + h_value - blank[b_index], h_value, key, g, b_index))
+
+    n_count: int = 0
+    while not stop.value:
+        # Take in the batches sent to this worker (waiting briefly when there is no work).
+        working: bool = bool(frontier) and frontier[0][0] < incumbent.value
+        while True:
+            try:
+                batch = inbox.get_nowait() if working else inbox.get(timeout=0.005)
+            except queue.Empty:
+                break
+            take(batch)
+            with lock:
+                idle[i] = 0
+                in_flight.value -= 1
+            working = True
+
+        # Expand a round of Nodes below the incumbent.
+        bound: int = incumbent.value
+        round_count: int = 0
+        while frontier and frontier[0][0] < bound and round_count < 64:
+            _, h_value, key, g, b_index = heapq.heappop(frontier)
+            # Skip entries that were replaced by a better path.
+            if g != g_score[key]:
+                continue
+            if key == goal_key:
+                with lock:
+                    incumbent.value = min(incumbent.value, g)
+                bound = incumbent.value
+                continue
+            round_count += 1
+            node = board.node(key, None, Direction.NONE, g, b_index, h_value)
+            for child in problem.expand(node, deltas):
+                child_h = child.h if child.h is not None else h(child)
+                if g + 1 + child_h - blank[child.b_index] >= bound:
+                    continue
+                entry = (child.key, child.b_index, g + 1, child_h, key, child.action.value)
+                owner = _hda_owner(child.key, workers)
+                if owner == i:
+                    take([entry])
+                else:
+                    outgoing[owner].append(entry)
+
+        # Send one batch to every owner of new children.
+        for owner, batch in enumerate(outgoing):
+            if batch:
+                with lock:
+                    in_flight.value += 1
+                inboxes[owner].put(batch)
+                outgoing[owner] = []
+        if round_count:
+            n_count += round_count
+            with lock:
+                expanded.value += round_count
+                if expanded.value >= max_nodes:
+                    stop.value = 2
+        elif not frontier or frontier[0][0] >= incumbent.value:
+            with lock:
+                idle[i] = 1
+
+    results.put((i, n_count))
+    # Answer the parents of the states on the solution path.
+    while True:
+        message = inbox.get()
+        if message is None:
+            return
+        if isinstance(message, int):
+            results.put(parents[message])
+
+class SolveResult(NamedTuple):
+    """
+    The outcome of one solve in a batch.
+
+    Attributes:
+        state (str): The initial state that was solved.
+
+        result (tuple[int, list] | str | None): The value returned by the solver.
+
+        output (str): Everything the solver printed.
+
+        seconds (float): The time spent in the solver.
+    """
+
+    state: str
+    result: tuple[int, list] | str | None
+    output: str
+    seconds: float
+
+def _worker_settings() -> dict:
+    """
+    A function to give the Puzzle settings a worker process must share with this one.
+
+    Returns:
+        dict: The settings, for _init_worker.
+    """
+
+    return {"compact": Puzzle.compact, "symmetry": Puzzle.symmetry, "cache_size": Puzzle.cache.capacity}
+
+def _init_worker(settings: dict) -> None:
+    # Worker processes may be spawned rather than forked (e.g. on macOS), so
+    # they are given the settings instead of inheriting them.
+    Puzzle.compact = settings["compact"]
+    Puzzle.symmetry = settings["symmetry"]
+    Puzzle.cache = SolutionCache(settings["cache_size"])
+
+def _solve_job(job: tuple[str, str, str, int, int | float]) -> SolveResult:
+    """
+    A function to solve one puzzle of a batch in a worker process.
+
+    Parameters:
+        job (tuple[str, str, str, int, int | float]): The state, algorithm, heuristic, k and max nodes.
+
+    Returns:
+        SolveResult: The outcome of the solve.
+    """
+
+    state, algorithm, heuristic, k, max_nodes = job
+    # Each worker process has its own Puzzle class state.
+    Puzzle.max_nodes = max_nodes
+    problem = Problem(initial=state, goal=Board.of(state).goal)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        start_time = time.time()
+        result = Puzzle.solve(problem, algorithm, heuristic, k)
+        seconds = time.time() - start_time
+    return SolveResult(state, result, output.getvalue(), seconds)
+
+def solve_many(states: Iterable[str],
+               algorithm: str = "a-star",
+               heuristic: str = "h2",
+               k: int = None,
+               max_nodes: int | float = math.inf,
+               jobs: int = None,
+               chunksize: int = None) -> list[SolveResult]:
+    """
+    A function to solve many independent puzzles across a pool of processes.
+
+    Parameters:
+        states (Iterable[str]): The initial states to solve (e.g. "012345678" or "0123456789abcdef").
+
+        algorithm (str): The search algorithm ("a-star", "ida-star", "epea-star", "bidirectional", "beam",
+            "beam-batch" or "table").
+
+        heuristic (str): The name of the heuristic for A* search.
+
+        k (int): The beam width for beam search.
+
+        max_nodes (int | float): The maximum number of Nodes to consider per puzzle.
+
+        jobs (int): The number of worker processes. Default is the number of CPUs.
+
+        chunksize (int): The number of puzzles sent to a worker at a time.
+            Default splits the batch into about four chunks per worker.
+
+    Returns:
+        list[SolveResult]: The outcome of each solve, in input order.
+    """
+
+    batch = [(state, algorithm, heuristic, k, max_nodes) for state in states]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(batch) <= 1:
+        return [_solve_job(job) for job in batch]
+
+    return _map_pool(_solve_job, batch, jobs, chunksize)
+
+def _map_pool(function: Callable, batch: list, jobs: int, chunksize: int = None) -> list:
+    """
+    A function to apply a function to a batch across a pool of processes, in order.
+
+    Parameters:
+        function (Callable): The function to apply (must be picklable).
+
+        batch (list): The arguments to apply the function to.
+
+        jobs (int): The number of worker processes.
+
+        chunksize (int): The number of items sent to a worker at a time.
+
+    Returns:
+        list: The results of the function, in input order.
+    """
+
+    if chunksize is None:
+        chunksize = max(1, len(batch) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(_worker_settings(),)) as executor:
+        return list(executor.map(function, batch, chunksize=chunksize))
+
+def _run_command(job: tuple[list[int], int | float, Command]) -> tuple[str, object, float]:
+    """
+    A function to run one solve command of a command file in a worker process.
+
+    Parameters:
+        job (tuple[list[int], int | float, Command]): The puzzle state, max nodes and command.
+
+    Returns:
+        tuple[str, object, float]: Everything the command printed, its result and the time it took.
+    """
+
+    state, max_nodes, command = job
+    Puzzle.state, Puzzle.is_valid, Puzzle.max_nodes = state, True, max_nodes
+    Puzzle.board = Board.get(math.isqrt(len(state)))
+    Puzzle.is_solvable = Puzzle.board.solvable(state, list(range(Puzzle.board.cells)))
+    return _timed_execute(command)
+
+def _timed_execute(command: Command) -> tuple[str, object, float]:
+    """
+    A function to run a command, capturing its output and timing it.
+
+    Parameters:
+        command (Command): The command to run.
+
+    Returns:
+        tuple[str, object, float]: Everything the command printed, its result and the time it took.
+    """
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        start_time = time.perf_counter_ns()
+        result = Puzzle.execute(command)
+        seconds = (time.perf_counter_ns() - start_time) / 1e9
+    return output.getvalue(), result, seconds
+
+def _solve_summary(output: str, result) -> tuple[str, int | None]:
+    """
+    A function to give the status and nodes considered of a solve from its output.
+
+    Parameters:
+        output (str): Everything the solver printed.
+
+        result: The value returned by the solver.
+
+    Returns:
+        tuple[str, int | None]: "solved", "exceeded", "unsolvable" or "failure", and the nodes considered.
+    """
+
+    if result == "UNSOLVABLE":
+        return "unsolvable", None
+    status = "solved" if isinstance(result, tuple) else "failure"
+    nodes = None
+    for line in output.splitlines():
+        if line.startswith("Nodes considered:"):
+            nodes = int(line.split()[-1])
+        elif line.startswith("Exceeded "):
+            status = "exceeded"
+    return status, nodes
+
+def _write_record(writer: io.TextIOBase,
+                  command: Command,
+                  state: str,
+                  output: str,
+                  result,
+                  seconds: float,
+                  is_timed: bool,
+                  output_format: str) -> None:
+    """
+    A function to write the outcome of one command.
+
+    Parameters:
+        writer (io.TextIOBase): The stream to write to.
+
+        command (Command): The command that was run.
+
+        state (str): The puzzle state the command was run on.
+
+        output (str): Everything the command printed.
+
+        result: The value returned by the command.
+
+        seconds (float): The time the command took.
+
+        is_timed (bool): Whether timing is on (text format only).
+
+        output_format (str): "text" for the original output, or "jsonl" for one JSON
+            object per solve or command with output.
     """
-    Reads commands from the file specified in the command line argument.
+
+    if output_format == "text":
+        writer.write(output)
+        if is_timed and command.opcode is Opcode.SOLVE:
+            writer.write("--- %s seconds ---" % seconds + "\n")
+        else:
+            writer.write("----------------------------------\n")
+        return
+
+    if command.opcode is Opcode.SOLVE:
+        algorithm, heuristic, k, options = command.args
+        status, nodes = _solve_summary(output, result)
+        record = {"command": "solve", "algorithm": algorithm, "heuristic": heuristic, "k": k,
+                  "state": state, "status": status, "nodes": nodes, "depth": None, "moves": None,
+                  "seconds": seconds}
+        if options:
+            record["options"] = options
+        for line in output.splitlines():
+            if line.startswith("Suboptimality bound: "):
+                record["bound"] = float(line[21:])
+        if isinstance(result, tuple):
+            record["depth"] = result[0]
+            record["moves"] = [item[-1] for item in result[1]]
+    elif output:
+        record = {"command": command.opcode.name.lower(), "state": state, "output": output}
+    else:
+        return
+    writer.write(json.dumps(record) + "\n")
+
+def _runs_in_process(command: Command) -> bool:
+    # HDA* already runs on its own processes, and a checkpointed solve reads or
+    # writes files that the solves around it share, so neither goes to the pool.
+    algorithm, _, _, options = command.args
+    return algorithm == "hda-star" or bool(options) and ("checkpoint" in options or "resume" in options)
+
+def run_commands(lines: Iterable[str],
+                 writer: io.TextIOBase = None,
+                 output_format: str = "text",
+                 jobs: int = 1,
+                 stats: StatsAggregator = None,
+                 instrument: io.TextIOBase = None) -> None:
     """
+    A function to run a stream of commands, writing each outcome in order.
+
+    Each line is parsed once into a Command. With more than one job, solves
+    are spread across a pool of processes as they are read; all other commands
+    still run in order in this process, so every solve sees the same puzzle
+    state and max nodes as it would when run sequentially. At most four solves
+    per job are in flight, and outcomes are written in order as soon as every
+    earlier outcome is, so output streams and memory stays bounded.
+
+    Parameters:
+        lines (Iterable[str]): The commands to run.
+
+        writer (io.TextIOBase): The stream to write to. Default is sys.stdout.
+
+        output_format (str): "text" for the original output, or "jsonl".
 
-    # Check for text file argument.
-    if len(sys.argv) < 2:
-        print("Requires 1 valid file name.")
+        jobs (int): The number of worker processes.
 
-    # Read commands from the given text file.
-    with open(sys.argv[1]) as file:
-        for line in file:
-            # Do each action in the file.
-            if "time" in line:
+        stats (StatsAggregator): An aggregator to feed every solved result to.
+
+        instrument (io.TextIOBase): A stream to write the SearchStats of each
+            instrumented solve to (one JSON object per solve).
+    """
+
+    writer = writer or sys.stdout
+
+    def write(record: list) -> None:
+        command, _, output, result, seconds, _ = record
+        if stats is not None and command.opcode is Opcode.SOLVE and isinstance(result, tuple):
+            nodes = _solve_summary(output, result)[1]
+            if nodes is not None:
+                stats.add(nodes, result[0], seconds)
+        _write_record(writer, *record, output_format)
+
+    is_timed: bool = False
+    # Records are (command, state, output, result, seconds, is_timed), in input
+    # order; a solve left to a worker holds its Future in place of the outcome.
+    pending: deque[list] = deque()
+    # The Futures of solves not yet written, oldest first.
+    in_flight: deque[Future] = deque()
+    window: int = 4 * jobs
+    # Records are written from this thread and from the pool's callbacks.
+    lock = threading.Lock()
+
+    def drain(future: Future = None) -> None:
+        # Writes the records at the head whose outcome is known. A failed solve
+        # is left at the head for this thread to raise.
+        with lock:
+            written: bool = False
+            while pending:
+                record = pending[0]
+                if isinstance(record[2], Future):
+                    if not record[2].done() or future is not None and record[2].exception() is not None:
+                        break
+                    record[2:5] = record[2].result()
+                    in_flight.popleft()
+                write(pending.popleft())
+                written = True
+            if written and executor is not None:
+                # Outcomes of the pool are flushed as they arrive, not when the input ends.
+                writer.flush()
+
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(_worker_settings(),)) if jobs > 1 else None
+    try:
+        for line in lines:
+            command = parse_command(line)
+            if command is None:
+                continue
+            if command.opcode is Opcode.TIME:
                 is_timed = True
-            elif "untime" in line:
+                continue
+            if command.opcode is Opcode.UNTIME:
                 is_timed = False
-            else:
-                if is_timed and "solve" in line:
-                    start_time = time.time()
-                    Puzzle.action(line)
-                    sys.stdout.write("--- %s seconds ---" % (time.time() - start_time) + "\n")
-                else:
-                    Puzzle.action(line)
-                    sys.stdout.write("----------------------------------\n")
\ No newline at end of file
+                continue
+            state = Puzzle.board.format(Puzzle.state)
+            if executor is not None and command.opcode is Opcode.SOLVE and Puzzle.is_valid and not _runs_in_process(command):
+                future = executor.submit(_run_command, (list(Puzzle.state), Puzzle.max_nodes, command))
+                with lock:
+                    pending.append([command, state, future, None, None, is_timed])
+                    in_flight.append(future)
+                    oldest = in_flight[0] if len(in_flight) > window else None
+                future.add_done_callback(drain)
+                if oldest is not None:
+                    # Wait (without the lock, which the callbacks take) for room in the window.
+                    wait([oldest])
+                    drain()
+                continue
+            record = [command, state, *_timed_execute(command), is_timed]
+            if instrument is not None and command.opcode is Opcode.SOLVE and Puzzle.last_stats is not None:
+                instrument.write(json.dumps({"state": state, **Puzzle.last_stats.as_dict()}) + "\n")
+            with lock:
+                pending.append(record)
+            drain()
+        with lock:
+            remaining = list(in_flight)
+        wait(remaining)
+        drain()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    writer.flush()
+
+# For command line parsing.
+import argparse
+import atexit
+
+if __name__ == "__main__":
+    """
+    Reads commands from the file specified in the command line argument (or stdin).
+    """
+
+    parser = argparse.ArgumentParser(description="Runs the 8-puzzle commands in a file.")
+    parser.add_argument("file", nargs="?", default="-",
+                        help="The file of commands to run (default: read from stdin).")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="The number of processes to spread solve commands across.")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text",
+                        help="The output format: the original text or one JSON object per solve.")
+    parser.add_argument("--cache-size", type=int,
+                        help="The number of solve results to cache (default: 0, which disables the cache, "
+                             "or 1024 with --cache-file).")
+    parser.add_argument("--cache-file",
+                        help="A file to load cached solve results from and save them to.")
+    parser.add_argument("--instrument", metavar="FILE",
+                        help="A file to write search counters and timings to (one JSON object per solve).")
+    parser.add_argument("--compact", action="store_true",
+                        help="Keep closed states of A* and beam search in a bounded bitmap.")
+    parser.add_argument("--symmetry", action="store_true",
+                        help="Solve mirrored states through one representative (sharing cached results) and strengthen the pattern database with mirrors.")
+    parser.add_argument("--stats",
+                        help="A file to write statistics of the solves to (the .stats format of filter_out.py).")
+    parser.add_argument("--validate", action="store_true",
+                        help="Only check the commands (states, moves and solvability) without solving.")
+    arguments = parser.parse_args()
+    if arguments.instrument and arguments.jobs > 1:
+        parser.error("--instrument runs in a single process and cannot be combined with --jobs.")
+
+    if arguments.validate:
+        with sys.stdin if arguments.file == "-" else open(arguments.file) as file:
+            issues = validate_commands(file)
+        for issue in issues:
+            print(f"line {issue.line}: {issue.text}: {issue.message}")
+        sys.exit(1 if issues else 0)
+
+    if arguments.cache_size is None:
+        arguments.cache_size = SolutionCache().capacity if arguments.cache_file else 0
+    Puzzle.cache = SolutionCache(arguments.cache_size)
+    if arguments.cache_file:
+        Puzzle.cache.load(arguments.cache_file)
+        atexit.register(Puzzle.cache.save, arguments.cache_file)
+
+    # Batch all output through one large buffered writer.
+    writer = io.TextIOWrapper(io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "w", closefd=False), 1 << 20))
+    file = sys.stdin if arguments.file == "-" else open(arguments.file)
+    stats = StatsAggregator() if arguments.stats else None
+    instrument = open(arguments.instrument, "w") if arguments.instrument else None
+    Puzzle.instrumented = instrument is not None
+    Puzzle.compact = arguments.compact
+    Puzzle.symmetry = arguments.symmetry
+    with file, contextlib.redirect_stdout(writer):
+        run_commands(file, writer, arguments.format, arguments.jobs, stats, instrument)
+    if instrument is not None:
+        instrument.close()
+    if stats is not None:
+        with open(arguments.stats, "w") as stats_file:
+            stats.write(stats_file)
@@ -0,0 +1,510 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+from typing import Iterable, TextIO
+
+from main import BeamLayer, Board, Problem, Puzzle, _solve_summary
+
+"""
+A local solve server speaking line-delimited JSON over TCP or a Unix socket.
+
+Each request is one JSON object per line:
+    {"id": 1, "op": "solve", "state": "724506831", "algorithm": "a-star",
+     "heuristic": "h2", "k": null, "goal": null, "max_nodes": 100000, "timeout": 5}
+    {"id": 2, "op": "solve", "state": "724506831", "algorithm": "wa-star",
+     "weight": 2.5, "deadline_ms": 50}
+    {"id": 3, "op": "solve", "state": "724506831", "algorithm": "beam", "k": 150,
+     "tie_break": "fifo", "duplicates": "drop"}
+    {"id": 1, "op": "cancel"}
+and each reply is one JSON object per line with the id of its request:
+    {"id": 1, "status": "solved", "nodes": 36, "depth": 20, "moves": [...], "seconds": 0.0031}
+
+The status of a solve is "solved", "exceeded" (node budget), "timeout" (time
+budget), "cancelled", "unsolvable", "failure", "busy" or "error". Replies are
+written as solves finish, so they may arrive out of order.
+
+Searches run in worker processes, one search per worker at a time, so
+concurrent requests never share Puzzle class state (the server process never
+touches it). Time budgets and cancellation interrupt a running search with a
+signal in its worker, which stops it at the next bytecode boundary. Requests
+wait in a bounded queue. A connection is always read from, so a cancel is seen
+at once, but its solves wait for room in the queue in order; a solve sent while
+queue_size solves of the same connection already wait is replied to as "busy",
+so clients are slowed down instead of buffered without bound.
+
+With --requests FILE, the requests of a file are served as one connection and
+the replies are written to stdout (in order with --workers 1), which is how
+test_server.output is made.
+"""
+
+class SearchInterrupted(Exception):
+    """
+    Raised in a worker process to stop the running search.
+
+    Attributes:
+        status (str): "timeout" or "cancelled".
+    """
+
+    def __init__(self, status: str) -> None:
+        super().__init__(status)
+        self.status: str = status
+
+def _worker(connection, cancel_target) -> None:
+    """
+    A function to serve solve jobs in a worker process until it receives None.
+
+    Parameters:
+        connection (multiprocessing.connection.Connection): The pipe to the server.
+
+        cancel_target (multiprocessing.Value): The sequence number of the job to cancel.
+    """
+
+    # The sequence number of the running job (0 while idle).
+    running = 0
+
+    def on_timeout(signum, frame):
+        if running:
+            raise SearchInterrupted("timeout")
+
+    def on_cancel(signum, frame):
+        if running and cancel_target.value == running:
+            raise SearchInterrupted("cancelled")
+
+    signal.signal(signal.SIGALRM, on_timeout)
+    signal.signal(signal.SIGUSR1, on_cancel)
+    # The server handles Ctrl-C.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        seq, state, goal, algorithm, heuristic, k, options, max_nodes, timeout = job
+        reply = {"status": "error", "nodes": None, "depth": None, "moves": None}
+        output = io.StringIO()
+        start_time = time.perf_counter_ns()
+        try:
+            Puzzle.max_nodes = max_nodes
+            problem = Problem(initial=state, goal=goal)
+            with contextlib.redirect_stdout(output):
+                running = seq
+                # A cancel sent before the job started is not signalled again.
+                if cancel_target.value == seq:
+                    raise SearchInterrupted("cancelled")
+                if timeout < math.inf:
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+                result = Puzzle.solve(problem, algorithm, heuristic, k, options)
+                running = 0
+            reply["status"], reply["nodes"] = _solve_summary(output.getvalue(), result)
+            if isinstance(result, tuple):
+                reply["depth"] = result[0]
+                reply["moves"] = [item[-1] for item in result[1]]
+            for line in output.getvalue().splitlines():
+                if line.startswith("Suboptimality bound: "):
+                    reply["bound"] = float(line[21:])
+        except SearchInterrupted as interrupt:
+            reply["status"] = interrupt.status
+        except Exception as error:
+            reply["message"] = str(error) or type(error).__name__
+        finally:
+            running = 0
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        reply["seconds"] = (time.perf_counter_ns() - start_time) / 1e9
+        connection.send(reply)
+
+class Worker:
+    """
+    A worker process running one search at a time.
+
+    Attributes:
+        process (multiprocessing.Process): The worker process.
+
+        connection (multiprocessing.connection.Connection): The pipe to the worker.
+
+        cancel_target (multiprocessing.Value): The sequence number of the job to cancel.
+
+        running (int): The sequence number of the job being searched (0 while idle).
+    """
+
+    def __init__(self) -> None:
+        """
+        A constructor for this Worker, starting its process.
+        """
+
+        self.connection, child = multiprocessing.Pipe()
+        self.cancel_target = multiprocessing.Value("q", 0, lock=False)
+        self.process = multiprocessing.Process(target=_worker, args=(child, self.cancel_target), daemon=True)
+        self.process.start()
+        child.close()
+        self.running: int = 0
+
+    def cancel(self, seq: int) -> None:
+        """
+        A function to interrupt a job if this worker is still running it.
+
+        Parameters:
+            seq (int): The sequence number of the job.
+        """
+
+        if self.running == seq:
+            self.cancel_target.value = seq
+            # The worker may already have exited (e.g. during shutdown).
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(self.process.pid, signal.SIGUSR1)
+
+    def stop(self) -> None:
+        self.connection.send(None)
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+
+class Job:
+    """
+    A solve request waiting for or running in a worker.
+
+    Attributes:
+        seq (int): The server-wide sequence number of the job.
+
+        id: The id the client gave the request.
+
+        args (tuple): The (state, goal, algorithm, heuristic, k, options, max_nodes, timeout) of the solve.
+
+        reply (Callable[[dict, Job], Awaitable]): Sends a reply to the client.
+
+        worker (Worker | None): The worker running the job, if any.
+
+        cancelled (bool): Whether the client cancelled the job.
+    """
+
+    def __init__(self, seq: int, id, args: tuple, reply) -> None:
+        self.seq: int = seq
+        self.id = id
+        self.args: tuple = args
+        self.reply = reply
+        self.worker: Worker | None = None
+        self.cancelled: bool = False
+
+class SolveServer:
+    """
+    An asyncio server dispatching solve requests to a pool of worker processes.
+
+    Attributes:
+        workers (int): The number of worker processes.
+
+        queue_size (int): The number of requests that may wait for a worker (and that
+            may wait for room in the queue, per connection).
+
+        max_nodes (int | float): The largest node budget of a request.
+
+        timeout (float): The largest time budget of a request, in seconds.
+    """
+
+    ALGORITHMS = ("a-star", "wa-star", "ida-star", "epea-star", "bidirectional", "beam", "beam-batch", "table")
+
+    def __init__(self,
+                 workers: int = None,
+                 queue_size: int = 64,
+                 max_nodes: int | float = math.inf,
+                 timeout: float = math.inf) -> None:
+        """
+        A constructor for this SolveServer.
+
+        Parameters:
+            workers (int): The number of worker processes. Default is the number of CPUs.
+
+            queue_size (int): The number of requests that may wait for a worker.
+
+            max_nodes (int | float): The largest (and default) node budget of a request.
+
+            timeout (float): The largest (and default) time budget of a request, in seconds.
+        """
+
+        self.workers: int = workers or os.cpu_count() or 1
+        self.queue_size: int = queue_size
+        self.max_nodes: int | float = max_nodes
+        self.timeout: float = timeout
+        self.seq: int = 0
+
+    def parse(self, request: dict, reply) -> Job:
+        """
+        A function to check a solve request and turn it into a Job.
+
+        Parameters:
+            request (dict): The decoded request.
+
+            reply (Callable[[dict], Awaitable]): Sends a reply to the client.
+
+        Returns:
+            Job: The Job to queue.
+
+        Raises:
+            ValueError: When the request is malformed.
+        """
+
+        algorithm = request.get("algorithm", "a-star")
+        if algorithm not in SolveServer.ALGORITHMS:
+            raise ValueError(f"Algorithm ({algorithm}) not recognized/implemented.")
+        heuristic = request.get("heuristic") or "h2"
+        if Puzzle.get_heuristic(heuristic) is None:
+            raise ValueError(f"Heuristic ({heuristic}) not recognized/implemented.")
+        k = request.get("k")
+        if algorithm in ("beam", "beam-batch") and not (isinstance(k, int) and k > 0):
+            raise ValueError("Beam search needs a positive integer k.")
+        state = str(request["state"])
+        board = Board.of(state)
+        board.validate(Board.parse(state))
+        goal = str(request.get("goal") or board.goal)
+        board.validate(Board.parse(goal))
+        if len(Board.parse(goal)) != board.cells:
+            raise ValueError("The initial and goal states of a Problem must have the same size.")
+        for budget in ("max_nodes", "timeout"):
+            value = request.get(budget)
+            if value is not None and not (isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0):
+                raise ValueError(f"The {budget} of a request must be a non-negative number.")
+        max_nodes = min(request.get("max_nodes") or math.inf, self.max_nodes)
+        timeout = min(request.get("timeout") or math.inf, self.timeout)
+        options = None
+        if algorithm == "wa-star":
+            options = {"weight": float(request.get("weight", 2.0))}
+            if options["weight"] < 1:
+                raise ValueError(f"Weight ({options['weight']}) must be at least 1.")
+            # Anytime search stops itself before the time budget with its best solution.
+            deadline_ms = request.get("deadline_ms")
+            if deadline_ms is None and timeout < math.inf:
+                deadline_ms = 900 * timeout
+            if deadline_ms is not None:
+                options["deadline_ms"] = min(float(deadline_ms), 1000 * timeout)
+        elif algorithm == "beam":
+            options = {}
+            if request.get("tie_break", "state") != "state":
+                options["tie_break"] = request["tie_break"]
+                if options["tie_break"] not in BeamLayer.TIE_BREAKS:
+                    raise ValueError(f"Tie-breaking policy ({options['tie_break']}) not recognized/implemented.")
+            if request.get("duplicates", "keep") != "keep":
+                options["duplicates"] = request["duplicates"]
+                if options["duplicates"] not in BeamLayer.DUPLICATES:
+                    raise ValueError(f"Duplicate policy ({options['duplicates']}) not recognized/implemented.")
+        self.seq += 1
+        return Job(self.seq, request.get("id"),
+                   (state, goal, algorithm, heuristic, k, options, max_nodes, timeout), reply)
+
+    async def run_worker(self, workers: list[Worker], i: int, queue: asyncio.Queue) -> None:
+        """
+        A function to feed queued Jobs to one worker process.
+
+        Parameters:
+            workers (list[Worker]): The workers.
+
+            i (int): The index of the worker to feed (replaced if its process dies).
+
+            queue (asyncio.Queue): The queued Jobs.
+        """
+
+        loop = asyncio.get_running_loop()
+        while True:
+            job: Job = await queue.get()
+            worker = workers[i]
+            try:
+                if job.cancelled:
+                    await job.reply({"id": job.id, "status": "cancelled"}, job)
+                    continue
+                job.worker, worker.running = worker, job.seq
+                try:
+                    worker.connection.send((job.seq, *job.args))
+                    result = await loop.run_in_executor(None, worker.connection.recv)
+                except (EOFError, OSError):
+                    result = {"status": "error", "message": "The worker process stopped."}
+                    workers[i] = Worker()
+                worker.running = 0
+                job.worker = None
+                await job.reply({"id": job.id, **result}, job)
+            finally:
+                queue.task_done()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                     queue: asyncio.Queue, linger: bool = False) -> None:
+        """
+        A function to serve one client connection.
+
+        Parameters:
+            reader (asyncio.StreamReader): The requests of the client.
+
+            writer (asyncio.StreamWriter): The replies to the client.
+
+            queue (asyncio.Queue): The queued Jobs.
+
+            linger (bool): Whether to reply to every request once the requests
+                end, instead of cancelling the unfinished ones.
+        """
+
+        lock = asyncio.Lock()
+        # The Jobs of this connection that have not been replied to, by id.
+        jobs: dict = {}
+        # Set while no Job of this connection is unfinished.
+        idle = asyncio.Event()
+        idle.set()
+        # The Jobs of this connection waiting for room in the queue, in order.
+        waiting: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        async def submit() -> None:
+            while True:
+                # Waits (without blocking reads of the connection) while the queue is full.
+                await queue.put(await waiting.get())
+
+        submitter = asyncio.create_task(submit())
+
+        async def reply(message: dict, job: Job = None) -> None:
+            if job is not None and jobs.get(job.id) is job:
+                del jobs[job.id]
+                if not jobs:
+                    idle.set()
+            # Replies to a client that has gone are dropped.
+            if writer.is_closing():
+                return
+            async with lock:
+                writer.write((json.dumps(message) + "\n").encode())
+                with contextlib.suppress(ConnectionError):
+                    await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    op = request.get("op", "solve")
+                except (ValueError, AttributeError):
+                    await reply({"id": None, "status": "error", "message": "Request is not a JSON object."})
+                    continue
+                if op == "cancel":
+                    job = jobs.get(request.get("id"))
+                    if job is not None:
+                        job.cancelled = True
+                        if job.worker is not None:
+                            job.worker.cancel(job.seq)
+                    continue
+                if op != "solve":
+                    await reply({"id": request.get("id"), "status": "error", "message": f"Operation ({op}) not recognized."})
+                    continue
+                try:
+                    job = self.parse(request, reply)
+                except (KeyError, TypeError, ValueError) as error:
+                    await reply({"id": request.get("id"), "status": "error", "message": str(error)})
+                    continue
+                if waiting.full():
+                    await reply({"id": job.id, "status": "busy", "message": "Too many requests are waiting."})
+                    continue
+                jobs[job.id] = job
+                idle.clear()
+                if waiting.empty() and not queue.full():
+                    queue.put_nowait(job)
+                else:
+                    waiting.put_nowait(job)
+            if linger:
+                await idle.wait()
+        finally:
+            submitter.cancel()
+            # A client that disconnects cancels its unfinished requests.
+            for job in jobs.values():
+                job.cancelled = True
+                if job.worker is not None:
+                    job.worker.cancel(job.seq)
+            writer.close()
+
+    async def serve(self, host: str = None, port: int = None, path: str = None) -> None:
+        """
+        A function to run the server until it is cancelled.
+
+        Parameters:
+            host (str): The host to listen on (TCP).
+
+            port (int): The port to listen on (TCP).
+
+            path (str): The Unix socket to listen on, instead of TCP.
+        """
+
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        workers = [Worker() for _ in range(self.workers)]
+        tasks = [asyncio.create_task(self.run_worker(workers, i, queue)) for i in range(len(workers))]
+
+        def client(reader, writer):
+            return self.handle(reader, writer, queue)
+
+        if path is not None:
+            server = await asyncio.start_unix_server(client, path)
+        else:
+            server = await asyncio.start_server(client, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for worker in workers:
+                worker.stop()
+
+    async def replay(self, lines: Iterable[str], out: TextIO) -> None:
+        """
+        A function to serve a stream of requests as one connection, writing the replies.
+
+        Unlike a client that disconnects, every request is replied to before
+        this returns.
+
+        Parameters:
+            lines (Iterable[str]): The requests, one JSON object per line.
+
+            out (TextIO): The stream to write the replies to.
+        """
+
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        workers = [Worker() for _ in range(self.workers)]
+        tasks = [asyncio.create_task(self.run_worker(workers, i, queue)) for i in range(len(workers))]
+        client, served = socket.socketpair()
+        try:
+            reader, writer = await asyncio.open_unix_connection(sock=served)
+            handler = asyncio.create_task(self.handle(reader, writer, queue, linger=True))
+            replies, requests = await asyncio.open_unix_connection(sock=client)
+            for line in lines:
+                requests.write(line.encode())
+                await requests.drain()
+            requests.write_eof()
+            while line := await replies.readline():
+                out.write(line.decode())
+            await handler
+            requests.close()
+        finally:
+            for task in tasks:
+                task.cancel()
+            for worker in workers:
+                worker.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves 8-puzzle solve requests as line-delimited JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="The host to listen on.")
+    parser.add_argument("--port", type=int, default=8582, help="The TCP port to listen on.")
+    parser.add_argument("--unix", metavar="PATH", help="A Unix socket to listen on instead of TCP.")
+    parser.add_argument("--workers", type=int, help="The number of worker processes (default: the number of CPUs).")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="The number of requests that may wait for a worker (and, per connection, for room in the queue).")
+    parser.add_argument("--max-nodes", type=int, help="The largest node budget of a request.")
+    parser.add_argument("--timeout", type=float, help="The largest time budget of a request, in seconds.")
+    parser.add_argument("--requests", metavar="FILE",
+                        help="A file of requests to reply to (on stdout) as one connection, instead of listening.")
+    arguments = parser.parse_args()
+
+    server = SolveServer(arguments.workers, arguments.queue_size,
+                         arguments.max_nodes or math.inf, arguments.timeout or math.inf)
+    if arguments.requests:
+        with open(arguments.requests) as file:
+            asyncio.run(server.replay(file, sys.stdout))
+        sys.exit(0)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve(arguments.host, arguments.port, arguments.unix))